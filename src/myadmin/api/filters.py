@@ -0,0 +1,53 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+
+from myadmin.filters import create_filterset, get_ordering, get_sort_fields
+
+
+class ModelFilterBackend(DjangoFilterBackend):
+    """
+    Filters by the generated FilterSet of the model, invalid values are
+    reported with a 400 response instead of an empty list.
+    """
+    def get_filter_class(self, view, queryset=None):
+        return create_filterset(queryset.model, using=queryset.db)
+
+    def filter_queryset(self, request, queryset, view):
+        filter_class = self.get_filter_class(view, queryset)
+        filterset = filter_class(
+            request.query_params, queryset=queryset, request=request
+        )
+        if not filterset.form.is_valid():
+            raise ValidationError(filterset.form.errors)
+        return filterset.qs
+
+
+class ModelOrderingFilter(OrderingFilter):
+    """
+    `?ordering=a,-b` checked by `myadmin.filters.get_ordering`: sorting
+    which needs an index the table does not have is refused with a 400
+    response instead of ignored, as are nullable columns the cursor pages
+    cannot compare. Lists are ordered by pk by default.
+    """
+    default_ordering = ('pk',)
+
+    def get_ordering(self, request, queryset, view):
+        value = request.query_params.get(self.ordering_param, '').strip()
+        if not value:
+            return self.default_ordering
+        try:
+            return get_ordering(
+                queryset.model, value, using=queryset.db, cursor=True
+            )
+        except DjangoValidationError as error:
+            raise ValidationError({self.ordering_param: error.messages})
+
+    def get_valid_fields(self, queryset, view, context={}):
+        return [
+            (name, name)
+            for name in get_sort_fields(
+                queryset.model, using=queryset.db, cursor=True
+            )
+        ]
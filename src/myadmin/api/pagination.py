@@ -0,0 +1,39 @@
+from rest_framework.pagination import CursorPagination, _positive_int
+
+
+class ModelCursorPagination(CursorPagination):
+    """
+    Keyset pagination with opaque next/previous cursors.
+
+    Pages are selected with `WHERE pk > position` on an indexed column
+    instead of OFFSET, so deep pages cost as much as the first one.
+    Page size can be chosen with `?page_size=` but never exceeds
+    `max_page_size`.
+    """
+    ordering = 'pk'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super(ModelCursorPagination, self).get_ordering(
+            request, queryset, view
+        )
+        pk = queryset.model._meta.pk
+        if pk.is_relation:
+            return ordering
+        # use the real column name, so rows from `values()` work as well
+        return tuple(
+            order.replace('pk', pk.name) if order.lstrip('-') == 'pk'
+            else order
+            for order in ordering
+        )
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
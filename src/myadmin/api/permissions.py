@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from myadmin.permissions import ACCESS_PANEL, has_perm
+
 
 class PanelAccessPermission(permissions.BasePermission):
     """
@@ -8,4 +10,21 @@ class PanelAccessPermission(permissions.BasePermission):
     message = "You don't have access to admin panel."
 
     def has_permission(self, request, view):
-        return request.user.has_perm('myadmin.access_panel')
+        return has_perm(request.user, ACCESS_PANEL)
+
+
+class ModelActionPermission(permissions.DjangoModelPermissions):
+    """
+    DjangoModelPermissions checked with the cached permission set, for
+    views with a `model` attribute.
+    """
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        model = getattr(view, 'model', None)
+        if model is None:
+            model = view.get_queryset().model
+        return all(
+            has_perm(request.user, perm)
+            for perm in self.get_required_permissions(request.method, model)
+        )
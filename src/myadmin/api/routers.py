@@ -0,0 +1,12 @@
+from rest_framework import routers
+
+
+class BulkRouter(routers.SimpleRouter):
+    """
+    SimpleRouter which also maps PATCH and DELETE on the list route to
+    the `bulk_update` and `bulk_destroy` actions.
+    """
+    routes = list(routers.SimpleRouter.routes)
+    routes[0] = routes[0]._replace(mapping=dict(
+        routes[0].mapping, patch='bulk_update', delete='bulk_destroy'
+    ))
@@ -1,4 +1,19 @@
+from functools import lru_cache
+
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.serializers import raise_errors_on_nested_writes
+
+from myadmin.catalog import catalog
+from myadmin.concurrency import save_changes
+from myadmin.timing import timed
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super(TimedListSerializer, self).data
 
 
 class GeneralSerializer(serializers.ModelSerializer):
@@ -6,3 +21,58 @@ class GeneralSerializer(serializers.ModelSerializer):
     class Meta:
         model = None
         exclude = ()
+        list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super(GeneralSerializer, self).data
+
+    def update(self, instance, validated_data):
+        """
+        Save only the fields whose value changed, conditionally on the
+        version token in the context ('version') if there is one.
+        """
+        raise_errors_on_nested_writes('update', self, validated_data)
+        opts = instance._meta
+        changed, many_to_many = [], {}
+        for name, value in validated_data.items():
+            field = opts.get_field(name)
+            if field.many_to_many:
+                many_to_many[name] = value
+                continue
+            new = value
+            if field.is_relation and value is not None:
+                new = value.pk  # compared by pk, without loading
+            if getattr(instance, field.attname) != new:
+                setattr(instance, name, value)
+                changed.append(name)
+        save_changes(instance, changed, self.context.get('version'))
+        for name, value in many_to_many.items():
+            getattr(instance, name).set(value)
+        return instance
+
+
+@lru_cache(maxsize=getattr(settings, 'MYADMIN_SERIALIZER_CACHE_SIZE', 256))
+def _build_serializer(custom_model, fields, catalog_version):
+    meta_attrs = {'model': custom_model}
+    if fields is not None:
+        meta_attrs.update(fields=list(fields), exclude=None)
+    meta = type('Meta', (GeneralSerializer.Meta,), meta_attrs)
+    return type(
+        '{}Serializer'.format(custom_model.__name__),
+        (GeneralSerializer,),
+        {'Meta': meta}
+    )
+
+
+def create_serializer(custom_model, fields=None):
+    """
+    GeneralSerializer subclass for `custom_model`, cached per model and
+    `fields` (all fields if None).
+
+    Never mutate GeneralSerializer.Meta, it is shared by all threads.
+    """
+    if fields is not None:
+        fields = tuple(fields)
+    return _build_serializer(custom_model, fields, catalog.version)
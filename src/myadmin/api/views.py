@@ -1,18 +1,381 @@
-from django.apps import apps
-from rest_framework import viewsets
+from collections import OrderedDict
 
-from myadmin.api.serializers import GeneralSerializer
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.relations import PKOnlyObject
+from rest_framework.response import Response
+
+from myadmin import bulk, concurrency, versions
+from myadmin.api.filters import ModelFilterBackend, ModelOrderingFilter
+from myadmin.api.pagination import ModelCursorPagination
+from myadmin.api.serializers import create_serializer
+from myadmin.catalog import catalog
+from myadmin.planner import plan_for_serializer
+from myadmin.timing import timed
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The object was changed since it was loaded.'
+    default_code = 'conflict'
 
 
 class GeneralViewSet(viewsets.ModelViewSet):
+    """
+    CRUD API for any installed model.
+
+    Reads accept `?fields=a,b` or `?exclude=a,b` to select columns, which
+    are pushed down to SQL, the filters of `create_filterset` and
+    `?ordering=` on indexed columns (see `get_ordering`). Lists
+    of plain columns are serialized from `values()` rows without
+    instantiating models.
+
+    Single objects carry a version token in the X-Object-Version header.
+    Updates sending it back only write if the object did not change in
+    the meantime, and fail with 409 otherwise.
 
-    @property
+    The list route also takes bulk requests, all-or-nothing with errors
+    reported per item: POST of a list of objects, PATCH of a list of
+    objects with their pk and DELETE of `{"ids": [...]}`, answered with
+    409 when some of the rows are protected from deletion.
+    """
+    pagination_class = ModelCursorPagination
+    filter_backends = [ModelFilterBackend, ModelOrderingFilter]
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+    values_fast_path = True
+    bulk_batch_size = None  # MYADMIN_BULK_BATCH_SIZE
+
+    @cached_property
     def model(self):
-        return apps.get_model(str(self.kwargs['model_name']).lower())
+        return catalog.get_model(str(self.kwargs['model_name']))
+
+    @cached_property
+    def field_names(self):
+        """
+        Field names selected by the query parameters, None for all fields.
+        The primary key is always included.
+        """
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        fields = self._split_param(self.fields_query_param)
+        exclude = self._split_param(self.exclude_query_param)
+        if fields is None and exclude is None:
+            return None
+
+        opts = self.model._meta
+        available = [
+            field.name for field in opts.concrete_fields + opts.many_to_many
+        ]
+        unknown = set(fields or ()) | set(exclude or ())
+        unknown.difference_update(available)
+        if unknown:
+            raise ValidationError({
+                'fields': 'Unknown fields: {}.'.format(
+                    ', '.join(sorted(unknown))
+                )
+            })
+        return [
+            name for name in available
+            if name == opts.pk.name or (
+                (fields is None or name in fields) and
+                name not in (exclude or ())
+            )
+        ]
+
+    def _split_param(self, param):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
 
     def get_queryset(self):
-        return self.model.objects.all()
+        queryset = self.model.objects.all()
+        if self.field_names is not None:
+            opts = self.model._meta
+            queryset = queryset.only(*[
+                name for name in self.field_names
+                if not opts.get_field(name).many_to_many
+            ])
+        return plan_for_serializer(queryset, self.get_serializer_class())
 
     def get_serializer_class(self):
-        GeneralSerializer.Meta.model = self.model
-        return GeneralSerializer
+        return create_serializer(self.model, fields=self.field_names)
+
+    def get_values_fields(self):
+        """
+        (name, column, serializer field) of every serialized field if all
+        of them can be read with `values()`, otherwise None.
+        """
+        opts = self.model._meta
+        if not self.values_fast_path or opts.pk.is_relation:
+            return None
+        result = []
+        for name, field in self.get_serializer().fields.items():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            result.append((name, model_field.attname, field))
+        return result
+
+    version_header = 'X-Object-Version'
+
+    def get_serializer_context(self):
+        context = super(GeneralViewSet, self).get_serializer_context()
+        context['version'] = self.request.META.get(
+            'HTTP_' + self.version_header.upper().replace('-', '_')
+        ) or None
+        return context
+
+    def with_version(self, response, instance):
+        token = concurrency.get_token(instance)
+        if token is not None:
+            response[self.version_header] = token
+        return response
+
+    @method_decorator(versions.api_condition)
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return self.with_version(Response(serializer.data), instance)
+
+    def update(self, request, *args, **kwargs):
+        response = super(GeneralViewSet, self).update(
+            request, *args, **kwargs
+        )
+        return self.with_version(response, self.updated_instance)
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                self.updated_instance = serializer.save()
+        except concurrency.ConcurrentModificationError as error:
+            raise Conflict(str(error))
+
+    @method_decorator(versions.api_condition)
+    def list(self, request, *args, **kwargs):
+        values_fields = self.get_values_fields()
+        if values_fields is None:
+            return super(GeneralViewSet, self).list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = [column for _, column, _ in values_fields]
+        # the cursor is read from the sorted column, selected if needed
+        columns += [
+            name.lstrip('-') for name in queryset.query.order_by
+            if name.lstrip('-') not in columns + ['pk']
+        ]
+        queryset = queryset.values(*columns)
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        rows = list(rows)
+        with timed('serializer'):
+            data = [
+                self.row_to_representation(row, values_fields)
+                for row in rows
+            ]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def row_to_representation(self, row, values_fields):
+        data = OrderedDict()
+        for name, column, field in values_fields:
+            value = row[column]
+            if value is not None:
+                if column != name:  # foreign key, serialized by its pk
+                    value = PKOnlyObject(pk=value)
+                value = field.to_representation(value)
+            data[name] = value
+        return data
+
+    def get_bulk_batch_size(self):
+        return self.bulk_batch_size or bulk.get_batch_size()
+
+    def _to_pk(self, value):
+        try:
+            return self.model._meta.pk.to_python(value)
+        except DjangoValidationError:
+            return None
+
+    def _bulk_error(self, errors, status_code=status.HTTP_400_BAD_REQUEST):
+        return Response({'errors': errors}, status=status_code)
+
+    def _check_unique(self, serializers, errors):
+        """
+        Report values of unique fields repeated within the request, which
+        the validators of each item cannot see.
+        """
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if field.unique and not field.primary_key
+        ]
+        for field in fields:
+            values = set()
+            for index, serializer in enumerate(serializers):
+                if serializer is None or errors[index]:
+                    continue
+                value = serializer.validated_data.get(field.name)
+                value = getattr(value, 'pk', value)
+                if value is None:
+                    continue
+                if value in values:
+                    errors[index] = {
+                        field.name: ['Duplicate value in the request.']
+                    }
+                values.add(value)
+
+    def _expect_list(self, data):
+        if not isinstance(data, list) or not all(
+                isinstance(item, dict) for item in data):
+            raise ValidationError({
+                'detail': 'Expected a list of objects.'
+            })
+        return data
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request, *args, **kwargs)
+        return super(GeneralViewSet, self).create(request, *args, **kwargs)
+
+    def bulk_create(self, request, *args, **kwargs):
+        items = self._expect_list(request.data)
+        serializers = [self.get_serializer(data=item) for item in items]
+        errors = [
+            {} if serializer.is_valid() else serializer.errors
+            for serializer in serializers
+        ]
+        self._check_unique(serializers, errors)
+        if any(errors):
+            return self._bulk_error(errors)
+
+        many_to_many = {field.name for field in self.model._meta.many_to_many}
+        objs, with_many_to_many = [], []
+        for serializer in serializers:
+            if many_to_many.intersection(serializer.validated_data):
+                with_many_to_many.append(serializer)
+            else:
+                objs.append(self.model(**serializer.validated_data))
+        try:
+            with transaction.atomic():
+                bulk.bulk_create(
+                    self.model, objs, batch_size=self.get_bulk_batch_size()
+                )
+                for serializer in with_many_to_many:
+                    serializer.save()
+        except IntegrityError as error:  # written concurrently
+            raise Conflict(str(error))
+        return Response(
+            {'created': len(serializers)}, status=status.HTTP_201_CREATED
+        )
+
+    def bulk_update(self, request, *args, **kwargs):
+        items = self._expect_list(request.data)
+        pk_name = self.model._meta.pk.name
+        pks = [
+            self._to_pk(item.get(pk_name, item.get('pk'))) for item in items
+        ]
+        instances = {}
+        for batch in bulk.batches(pks, self.get_bulk_batch_size()):
+            instances.update(self.model._default_manager.in_bulk(
+                [pk for pk in batch if pk is not None]
+            ))
+
+        errors, serializers = [], []
+        for pk, item in zip(pks, items):
+            if pk not in instances:
+                errors.append({pk_name: ['Not found.']})
+                serializers.append(None)
+                continue
+            serializer = self.get_serializer(
+                instances[pk], data=item, partial=True
+            )
+            errors.append({} if serializer.is_valid() else serializer.errors)
+            serializers.append(serializer)
+        self._check_unique(serializers, errors)
+        if any(errors):
+            return self._bulk_error(errors)
+
+        # one batched UPDATE per distinct set of changed fields
+        many_to_many = {field.name for field in self.model._meta.many_to_many}
+        groups = {}
+        try:
+            with transaction.atomic():
+                for serializer in serializers:
+                    data = serializer.validated_data
+                    if many_to_many.intersection(data):
+                        serializer.save()
+                        continue
+                    for attr, value in data.items():
+                        setattr(serializer.instance, attr, value)
+                    groups.setdefault(frozenset(data), []).append(
+                        serializer.instance
+                    )
+                for fields, objs in groups.items():
+                    bulk.bulk_update(
+                        self.model, objs, fields,
+                        batch_size=self.get_bulk_batch_size()
+                    )
+        except IntegrityError as error:  # written concurrently
+            raise Conflict(str(error))
+        return Response({'updated': len(serializers)})
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = None
+        if isinstance(request.data, dict):
+            ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            raise ValidationError({'ids': 'Expected a list of ids.'})
+        pks = [self._to_pk(value) for value in ids]
+        existing = set()
+        for batch in bulk.batches(pks, self.get_bulk_batch_size()):
+            existing.update(self.model._default_manager.filter(
+                pk__in=[pk for pk in batch if pk is not None]
+            ).values_list('pk', flat=True))
+        errors = [{} if pk in existing else ['Not found.'] for pk in pks]
+        if any(errors):
+            return self._bulk_error(errors)
+
+        protected = self._find_protected(existing)
+        if protected:
+            return self._bulk_error(
+                [protected.get(pk, {}) for pk in pks],
+                status.HTTP_409_CONFLICT
+            )
+        try:
+            with transaction.atomic():
+                for batch in bulk.batches(
+                        existing, self.get_bulk_batch_size()):
+                    self.model._default_manager.filter(pk__in=batch).delete()
+        except ProtectedError as error:  # referenced concurrently
+            raise Conflict(error.args[0])
+        return Response({'deleted': len(existing)})
+
+    def _find_protected(self, pks):
+        """
+        Error messages of the `pks` whose rows are protected from deletion,
+        only looked up row by row in batches with protected rows.
+        """
+        manager = self.model._default_manager
+        protected = {}
+        for batch in bulk.batches(pks, self.get_bulk_batch_size()):
+            if not bulk.find_protected(manager.filter(pk__in=batch)):
+                continue
+            for pk in batch:
+                fields = bulk.find_protected(manager.filter(pk=pk))
+                if fields:
+                    protected[pk] = [
+                        'Protected by {}.{}.'.format(
+                            field.model._meta.label, field.name
+                        ) for field, _ in fields
+                    ]
+        return protected
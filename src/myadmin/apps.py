@@ -1,5 +1,59 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.models.signals import m2m_changed, post_save, post_delete
 
 
 class MyadminConfig(AppConfig):
     name = 'myadmin'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import Group, Permission
+        from myadmin import checks  # noqa: F401 (registers the checks)
+        from myadmin import counts, permissions, search, tracking, versions
+        from myadmin.catalog import catalog
+        from myadmin.signals import (
+            bulk_saved,
+            panel_changed,
+            panel_models_added
+        )
+
+        catalog.build()
+        request_started.connect(tracking.sync, dispatch_uid='myadmin')
+        panel_changed.connect(tracking.sync, dispatch_uid='myadmin')
+        for signal, receiver in ((post_save, counts.model_saved),
+                                 (post_delete, counts.model_deleted),
+                                 (bulk_saved, counts.model_bulk_saved)):
+            tracking.connect(signal, receiver, 'myadmin_count')
+        for signal, receiver in ((post_save, versions.model_changed),
+                                 (post_delete, versions.model_changed),
+                                 (bulk_saved, versions.model_changed),
+                                 (m2m_changed, versions.model_m2m_changed)):
+            tracking.connect(signal, receiver, 'myadmin_version')
+        for signal, receiver in ((post_save, search.object_saved),
+                                 (post_delete, search.object_deleted),
+                                 (bulk_saved, search.objects_bulk_saved)):
+            tracking.connect(signal, receiver, 'myadmin_search')
+        # counts and versions may have gone stale while not tracked
+        panel_models_added.connect(
+            counts.models_added, dispatch_uid='myadmin_count'
+        )
+        panel_models_added.connect(
+            versions.models_added, dispatch_uid='myadmin_version'
+        )
+        panel_models_added.connect(
+            search.models_added, dispatch_uid='myadmin_search'
+        )
+        user_model = get_user_model()
+        for through in (user_model.user_permissions.through,
+                        user_model.groups.through,
+                        Group.permissions.through):
+            m2m_changed.connect(
+                permissions.permissions_changed, sender=through,
+                dispatch_uid='myadmin_perms'
+            )
+        for model in (Group, Permission):
+            post_delete.connect(
+                permissions.group_or_permission_deleted, sender=model,
+                dispatch_uid='myadmin_perms'
+            )
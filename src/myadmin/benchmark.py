@@ -0,0 +1,281 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from myadmin import registry
+from testapp.models import (
+    BenchCategory,
+    BenchRelated,
+    BenchWide,
+    TestModel1,
+    TestModel2
+)
+
+
+SIZES = (1000, 100000, 1000000)
+SEED_BATCH_SIZE = 10000
+CATEGORIES = 100
+PANEL_MODELS = [
+    'testapp.TestModel1', 'testapp.TestModel2',
+    'testapp.BenchWide', 'testapp.BenchRelated',
+]
+
+
+def _fill(model, size, make):
+    """
+    INSERT rows built by `make(index)` until `model` has `size` rows.
+    Signals are not sent, caches are cleared once seeding is done.
+    """
+    start = model._default_manager.count()
+    for offset in range(start, size, SEED_BATCH_SIZE):
+        with transaction.atomic():
+            model._default_manager.bulk_create([
+                make(index)
+                for index in range(offset, min(offset + SEED_BATCH_SIZE, size))
+            ], batch_size=500)
+
+
+def _pk_range(model):
+    pks = model._default_manager.order_by('pk').values_list('pk', flat=True)
+    return pks.first(), pks.last()
+
+
+def seed(size):
+    """
+    Grow the testapp and synthetic benchmark models to `size` rows.
+    """
+    _fill(BenchCategory, CATEGORIES, lambda i: BenchCategory(
+        name='category {}'.format(i)
+    ))
+    for model in (TestModel1, TestModel2):
+        _fill(model, size, lambda i, model=model: model(
+            text='{} object {}'.format(model.__name__, i), integer=i
+        ))
+    _fill(BenchWide, size, lambda i: BenchWide(
+        char_1='wide {}'.format(i), char_2='b' * 50, char_3='c' * 50,
+        int_1=i, int_2=i % 7, decimal=i / 100, text='lorem ipsum ' * 10
+    ))
+    first_category = _pk_range(BenchCategory)[0]
+    start = BenchRelated.objects.count()
+    parents, wides = [
+        list(model._default_manager.order_by('pk').values_list(
+            'pk', flat=True
+        )[start:size]) for model in (TestModel1, BenchWide)
+    ]
+    _fill(BenchRelated, size, lambda i: BenchRelated(
+        name='related {}'.format(i),
+        category_id=first_category + i % CATEGORIES,
+        parent_id=parents[i - start], wide_id=wides[i - start]
+    ))
+    cache.clear()
+
+
+def measure(request, setup=None, repeat=5):
+    """
+    Median latency (ms) of `repeat` calls of `request(**setup())`, plus
+    the query count and peak Python memory (KiB) of a separate traced
+    call.
+    """
+    def call():
+        kwargs = setup() if setup is not None else {}
+        start = time.perf_counter()
+        response = request(**kwargs)
+        return response, (time.perf_counter() - start) * 1000
+
+    kwargs = setup() if setup is not None else {}
+    reset_queries()  # a full log (9000 entries) would hide new queries
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request(**kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        # captured queries are a slice of the live query log, which the
+        # next request resets
+        query_count = len(queries)
+    finally:
+        tracemalloc.stop()
+    latencies = [call()[1] for _ in range(repeat)]
+    return OrderedDict([
+        ('status', response.status_code),
+        ('latency_ms', round(statistics.median(latencies), 2)),
+        ('queries', query_count),
+        ('peak_kb', round(peak / 1024, 1)),
+    ])
+
+
+class Scenarios(object):
+    """
+    Requests of the panel, list, CRUD views and every GeneralViewSet
+    action, made by a superuser.
+    """
+    label = 'testapp.TestModel1'
+
+    def __init__(self, size):
+        self.size = size
+        user_model = get_user_model()
+        user = user_model._default_manager.filter(
+            username='benchmark'
+        ).first() or user_model._default_manager.create_superuser(
+            'benchmark', 'benchmark@example.com', 'benchmark'
+        )
+        self.client = Client()
+        self.client.force_login(user)
+        self.random = random.Random(size)
+
+    def url(self, name, **kwargs):
+        return reverse('myadmin:' + name, kwargs=kwargs)
+
+    def model_url(self, name, **kwargs):
+        return self.url(name, model_name=self.label, **kwargs)
+
+    def cold_cache(self):
+        cache.clear()
+        return {}
+
+    def new_object(self):
+        return {'pk': TestModel1.objects.create(text='new', integer=1).pk}
+
+    def existing_object(self):
+        low, high = _pk_range(TestModel1)
+        return {'pk': TestModel1.objects.filter(
+            pk__gte=self.random.randint(low, high)
+        ).order_by('pk').values_list('pk', flat=True).first()}
+
+    def new_objects(self, count=100):
+        objs = TestModel1.objects.bulk_create([
+            TestModel1(text='bulk', integer=i) for i in range(count)
+        ])
+        if objs and objs[0].pk is None:  # not returned by the database
+            objs = TestModel1.objects.order_by('-pk')[:count]
+        return {'pks': [obj.pk for obj in objs]}
+
+    def get_scenarios(self):
+        """
+        `(name, request, setup)` triples, `setup()` returns the keyword
+        arguments of `request` and is not timed.
+        """
+        client = self.client
+        url = self.model_url
+        content_type = 'application/json'
+        data = {'text': 'changed', 'integer': 2}
+        scenarios = [
+            ('panel_cold', lambda: client.get(self.url('panel')),
+             self.cold_cache),
+            ('panel_warm', lambda: client.get(self.url('panel')), None),
+        ]
+        deep_page = max(self.size // 15 - 1, 1)
+        for label in PANEL_MODELS:
+            list_url = self.url('objects', model_name=label)
+            api_url = self.url('model-list', model_name=label)
+            scenarios += [
+                ('list:' + label,
+                 lambda list_url=list_url: client.get(list_url), None),
+                ('list_deep:' + label,
+                 lambda list_url=list_url: client.get(
+                     list_url, {'page': deep_page}
+                 ), None),
+                ('api_list:' + label,
+                 lambda api_url=api_url: client.get(api_url), None),
+            ]
+        scenarios += [
+            ('create_get', lambda: client.get(url('create')), None),
+            ('create_post', lambda: client.post(url('create'), data), None),
+            ('edit_get', lambda pk: client.get(url('edit', obj_pk=pk)),
+             self.existing_object),
+            ('edit_post', lambda pk: client.post(
+                url('edit', obj_pk=pk), data
+            ), self.existing_object),
+            ('delete', lambda pk: client.get(url('delete', obj_pk=pk)),
+             self.new_object),
+            ('api_list_fields', lambda: client.get(
+                url('model-list'), {'fields': 'id,integer'}
+            ), None),
+            ('api_retrieve', lambda pk: client.get(
+                url('model-detail', pk=pk)
+            ), self.existing_object),
+            ('api_create', lambda: client.post(url('model-list'), data),
+             None),
+            ('api_update', lambda pk: client.put(
+                url('model-detail', pk=pk), json.dumps(data), content_type
+            ), self.existing_object),
+            ('api_partial_update', lambda pk: client.patch(
+                url('model-detail', pk=pk), json.dumps({'integer': 3}),
+                content_type
+            ), self.existing_object),
+            ('api_destroy', lambda pk: client.delete(
+                url('model-detail', pk=pk)
+            ), self.new_object),
+            ('api_bulk_create', lambda: client.post(
+                url('model-list'),
+                json.dumps([dict(data, integer=i) for i in range(100)]),
+                content_type
+            ), None),
+            ('api_bulk_update', lambda pks: client.patch(
+                url('model-list'),
+                json.dumps([{'id': pk, 'integer': 4} for pk in pks]),
+                content_type
+            ), self.new_objects),
+            ('api_bulk_destroy', lambda pks: client.delete(
+                url('model-list'), json.dumps({'ids': pks}), content_type
+            ), self.new_objects),
+        ]
+        return scenarios
+
+
+def run_benchmarks(sizes=SIZES, repeat=5, progress=None):
+    """
+    `{size: {scenario: measurement}}` for each of `sizes`, growing the
+    tables between sizes.
+    """
+    results = OrderedDict()
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for size in sorted(sizes):
+            seed(size)
+            registry.add_models(PANEL_MODELS)
+            scenarios = Scenarios(size)
+            results[str(size)] = measurements = OrderedDict()
+            for name, request, setup in scenarios.get_scenarios():
+                measurements[name] = measure(request, setup, repeat)
+                if progress is not None:
+                    progress(size, name, measurements[name])
+    return results
+
+
+def compare(results, baseline, latency_tolerance=0.25,
+            memory_tolerance=0.25):
+    """
+    Regressions of `results` against `baseline` results: latency or peak
+    memory above the baseline by more than the tolerance, or any extra
+    query.
+    """
+    regressions = []
+    for size, measurements in results.items():
+        for name, current in measurements.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            checks = [
+                ('latency_ms',
+                 previous['latency_ms'] * (1 + latency_tolerance)),
+                ('queries', previous['queries']),
+                ('peak_kb', previous['peak_kb'] * (1 + memory_tolerance)),
+            ]
+            for metric, limit in checks:
+                if current[metric] > limit:
+                    regressions.append(
+                        '{} rows, {}: {} {} > {} before'.format(
+                            size, name, metric, current[metric],
+                            previous[metric]
+                        )
+                    )
+    return regressions
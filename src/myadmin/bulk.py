@@ -0,0 +1,182 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.db.models.deletion import (
+    ProtectedError,
+    get_candidate_relations_to_delete,
+)
+
+from myadmin.signals import bulk_saved
+
+
+def get_batch_size():
+    return getattr(settings, 'MYADMIN_BULK_BATCH_SIZE', 500)
+
+
+def batches(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_create(model, objs, batch_size=None, using=None):
+    """
+    INSERT `objs` in batches and send `bulk_saved`.
+    """
+    using = using or model._default_manager.db
+    objs = model._default_manager.db_manager(using).bulk_create(
+        objs, batch_size=batch_size or get_batch_size()
+    )
+    bulk_saved.send(
+        sender=model, using=using, created=len(objs), objs=objs
+    )
+    return objs
+
+
+def bulk_update(model, objs, fields, batch_size=None, using=None):
+    """
+    UPDATE `fields` of `objs` with one `CASE WHEN pk = ...` statement per
+    batch and send `bulk_saved`. Returns the number of updated rows.
+    """
+    using = using or model._default_manager.db
+    fields = [model._meta.get_field(name) for name in fields]
+    if not objs or not fields:
+        return 0
+    updated = 0
+    with transaction.atomic(using=using, savepoint=False):
+        for batch in batches(objs, batch_size or get_batch_size()):
+            values = {
+                field.attname: Case(*[
+                    When(pk=obj.pk, then=Value(
+                        getattr(obj, field.attname), output_field=field
+                    )) for obj in batch
+                ], output_field=field)
+                for field in fields
+            }
+            updated += model._default_manager.db_manager(using).filter(
+                pk__in=[obj.pk for obj in batch]
+            ).update(**values)
+    bulk_saved.send(sender=model, using=using, created=0, objs=objs)
+    return updated
+
+
+def get_delete_chunk_size():
+    return getattr(settings, 'MYADMIN_DELETE_CHUNK_SIZE', 500)
+
+
+def _reverse_relations(model):
+    # same relations the deletion collector follows, including the hidden
+    # ones of many-to-many through tables
+    return list(get_candidate_relations_to_delete(model._meta))
+
+
+def cascade_preview(queryset, max_depth=5):
+    """
+    Rows affected by deleting `queryset`, counted with COUNT queries.
+
+    Returns a list of `(model label, field, on_delete name, count)` for
+    the root rows and every related row that would be deleted, updated or
+    protect the root rows, skipping relations without rows.
+    """
+    result = [(queryset.model._meta.label, '', 'DELETE', queryset.count())]
+
+    def walk(model, queryset, depth):
+        for rel in _reverse_relations(model):
+            related = rel.related_model._base_manager.filter(
+                **{'{}__in'.format(rel.field.name): queryset}
+            )
+            count = related.count()
+            if not count:
+                continue
+            action = rel.on_delete.__name__
+            result.append(
+                (rel.related_model._meta.label, rel.field.name, action, count)
+            )
+            if action == 'CASCADE' and depth < max_depth:
+                walk(rel.related_model, related.values('pk'), depth + 1)
+
+    walk(queryset.model, queryset.values('pk'), 1)
+    return result
+
+
+def find_protected(queryset, max_depth=20):
+    """
+    Rows protecting `queryset`, or rows cascading from it down to
+    `max_depth` levels, from deletion, with one EXISTS query per relation
+    and level. Returns a list of `(relation field, queryset)`.
+    """
+    using = queryset.db
+    protected = []
+
+    def walk(model, queryset, depth):
+        for rel in _reverse_relations(model):
+            related = rel.related_model._base_manager.using(using).filter(
+                **{'{}__in'.format(rel.field.name): queryset}
+            )
+            action = rel.on_delete.__name__
+            if action == 'PROTECT':
+                if related.exists():
+                    protected.append((rel.field, related))
+            elif action == 'CASCADE' and depth < max_depth and (
+                related.exists()
+            ):
+                walk(rel.related_model, related.values('pk'), depth + 1)
+
+    walk(queryset.model, queryset.values('pk'), 1)
+    return protected
+
+
+def chunked_delete(queryset, chunk_size=None, max_depth=5, _depth=1):
+    """
+    Delete `queryset` in chunks of `chunk_size` rows, each chunk in its
+    own short transaction.
+
+    Rows cascading from a chunk are deleted first, chunk by chunk, down to
+    `max_depth` levels, so Django's collector never loads a whole cascade.
+    Returns a Counter of deleted rows per model label.
+
+    As chunks are committed one by one, ProtectedError is raised before
+    anything is deleted when some of the rows are protected.
+    """
+    chunk_size = chunk_size or get_delete_chunk_size()
+    model = queryset.model
+    using = queryset.db
+    if _depth == 1:
+        protected = find_protected(queryset)
+        if protected:
+            raise ProtectedError(
+                'Cannot delete some {} objects because they are referenced '
+                'through protected foreign keys: {}.'.format(
+                    model._meta.label, ', '.join(
+                        '{}.{}'.format(field.model._meta.label, field.name)
+                        for field, _ in protected
+                    )
+                ),
+                [obj for _, related in protected for obj in related[:10]]
+            )
+    deleted = Counter()
+    while True:
+        chunk = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        if _depth < max_depth:
+            for rel in _reverse_relations(model):
+                if rel.on_delete.__name__ != 'CASCADE':
+                    continue
+                manager = rel.related_model._base_manager.using(using)
+                related = manager.filter(
+                    **{'{}__in'.format(rel.field.name): chunk}
+                )
+                if rel.related_model is model:
+                    related = related.exclude(pk__in=chunk)
+                deleted.update(chunked_delete(
+                    related, chunk_size, max_depth, _depth + 1
+                ))
+        with transaction.atomic(using=using):
+            _, per_model = model._base_manager.using(using).filter(
+                pk__in=chunk
+            ).delete()
+        deleted.update(per_model)
+    return deleted
@@ -0,0 +1,122 @@
+from django.apps import apps
+from django.contrib.auth import get_permission_codename
+from django.core.urlresolvers import reverse
+
+
+URL_NAMES = {
+    'list': 'myadmin:objects',
+    'create': 'myadmin:create',
+    'edit': 'myadmin:edit',
+    'delete': 'myadmin:delete',
+}
+
+
+class ModelInfo(object):
+    """
+    Metadata of an installed model precomputed for the panel views.
+    """
+    def __init__(self, model, index):
+        opts = model._meta
+        self.model = model
+        self.index = index
+        self.label = opts.label
+        self.label_lower = opts.label_lower
+        self.app_label = opts.app_label
+        self.name = opts.object_name
+        self.verbose_name = opts.verbose_name
+        self.verbose_name_plural = opts.verbose_name_plural
+        self.perms = {
+            action: '{}.{}'.format(
+                opts.app_label, get_permission_codename(action, opts)
+            )
+            for action in ('add', 'change', 'delete')
+        }
+
+    def __repr__(self):
+        return '<ModelInfo: {}>'.format(self.label)
+
+    @property
+    def add_perm(self):
+        return self.perms['add']
+
+    @property
+    def change_perm(self):
+        return self.perms['change']
+
+    @property
+    def delete_perm(self):
+        return self.perms['delete']
+
+    def url(self, action, **kwargs):
+        kwargs['model_name'] = self.label
+        return reverse(URL_NAMES[action], kwargs=kwargs)
+
+
+class ModelCatalog(object):
+    """
+    Label -> ModelInfo index of all installed models.
+
+    Built once the app registry is ready, `version` changes on every
+    rebuild so dependent caches can tell they are stale.
+    """
+    def __init__(self):
+        self.infos = []
+        self.by_label = {}
+        self.by_model = {}
+        self.version = 0
+
+    def build(self):
+        infos = [
+            ModelInfo(model, index)
+            for index, model in enumerate(apps.get_models())
+        ]
+        by_label = {}
+        for info in infos:
+            by_label[info.label] = info
+            by_label[info.label_lower] = info
+        self.by_label = by_label
+        self.by_model = {info.model: info for info in infos}
+        self.infos = infos
+        self.version += 1
+
+    def _ensure_built(self):
+        if not self.version:
+            self.build()
+
+    def __iter__(self):
+        self._ensure_built()
+        return iter(self.infos)
+
+    def __len__(self):
+        self._ensure_built()
+        return len(self.infos)
+
+    def __contains__(self, label):
+        self._ensure_built()
+        return label in self.by_label or label.lower() in self.by_label
+
+    def get(self, label):
+        """
+        ModelInfo for 'app_label.ModelName' (any case) or a model class.
+        Raises LookupError for unknown models, like `apps.get_model`.
+        """
+        self._ensure_built()
+        if isinstance(label, type):
+            try:
+                return self.by_model[label]
+            except KeyError:
+                raise LookupError('Model {} is not installed.'.format(label))
+        try:
+            return self.by_label[label]
+        except KeyError:
+            pass
+        try:
+            return self.by_label[label.lower()]
+        except KeyError:
+            raise LookupError('Model {} is not installed.'.format(label))
+
+    def get_model(self, label):
+        return self.get(label).model
+
+
+catalog = ModelCatalog()
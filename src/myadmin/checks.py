@@ -0,0 +1,28 @@
+from django.core.cache import caches
+from django.core.checks import Warning, register, Tags
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Registry, model versions, permissions and counts are invalidated
+    through stamps in the default cache, which all workers must share.
+    """
+    backend = caches['default']
+    path = '{}.{}'.format(
+        type(backend).__module__, type(backend).__name__
+    )
+    if path not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'The default cache is local to each process, so changes made in '
+        'one worker are not seen by the others.',
+        hint='Configure a shared CACHES backend (memcached, Redis or the '
+             'database cache) when running more than one process.',
+        id='myadmin.W001',
+    )]
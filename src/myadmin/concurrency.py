@@ -0,0 +1,127 @@
+import hashlib
+import json
+
+from django.core import signing
+from django.db import router, transaction
+from django.db.models.signals import post_save, pre_save
+
+
+TOKEN_SALT = 'myadmin.concurrency'
+
+
+class ConcurrentModificationError(Exception):
+    """
+    The object was changed or deleted since its version token was issued.
+    """
+
+
+def token_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def row_digest(obj):
+    """
+    Digest of the column values of `obj`.
+    """
+    digest = hashlib.sha1()
+    for field in token_fields(type(obj)):
+        value = field.value_from_object(obj)
+        digest.update(json.dumps(
+            None if value is None else field.value_to_string(obj)
+        ).encode())
+    return digest.hexdigest()
+
+
+def get_token(obj):
+    """
+    Signed version token of the current column values of `obj`, None if
+    some of them are deferred.
+
+    The token only carries a digest of the values, so it stays small and
+    reveals no columns, e.g. the ones excluded from the forms.
+    """
+    if obj.pk is None or obj.get_deferred_fields():
+        return None
+    return signing.dumps(
+        [obj._meta.label, str(obj.pk), row_digest(obj)], salt=TOKEN_SALT
+    )
+
+
+def load_token(obj, token):
+    """
+    Digest of the column values of `obj` the token was issued for.
+    """
+    try:
+        label, pk, digest = signing.loads(token, salt=TOKEN_SALT)
+    except (signing.BadSignature, ValueError):
+        raise ConcurrentModificationError('Invalid version token.')
+    if label != obj._meta.label or pk != str(obj.pk):
+        raise ConcurrentModificationError('Invalid version token.')
+    return digest
+
+
+def get_update_fields(obj, names):
+    """
+    Fields of `names` with a column, plus the `auto_now` fields which
+    `save(update_fields=...)` would otherwise leave unchanged.
+    """
+    opts = obj._meta
+    fields = [
+        field for field in map(opts.get_field, names)
+        if field.concrete and not field.many_to_many
+    ]
+    if fields:
+        fields += [
+            field for field in opts.concrete_fields
+            if getattr(field, 'auto_now', False) and field not in fields
+        ]
+    return fields
+
+
+def save_changes(obj, names, token=None):
+    """
+    Save only the fields of `names` of an existing `obj`.
+
+    With a version `token` the row is locked and compared with the values
+    the token was issued for, raising ConcurrentModificationError if it
+    changed, also when no column is written (e.g. only many-to-many
+    fields changed, which should be saved in the same transaction).
+    Signals are sent as by `Model.save`.
+    """
+    fields = get_update_fields(obj, names)
+    if token is None:
+        if not fields:
+            return False
+        obj.save(update_fields=[field.name for field in fields])
+        return True
+
+    expected = load_token(obj, token)
+    model = type(obj)
+    using = router.db_for_write(model, instance=obj)
+    update_fields = frozenset(field.name for field in fields)
+    with transaction.atomic(using=using, savepoint=False):
+        current = model._base_manager.using(using).select_for_update(
+        ).filter(pk=obj.pk).first()
+        if current is None or row_digest(current) != expected:
+            raise ConcurrentModificationError(
+                'The object was changed since it was loaded.'
+            )
+        if not fields:
+            return False
+        pre_save.send(
+            sender=model, instance=obj, raw=False, using=using,
+            update_fields=update_fields
+        )
+        values = {
+            field.attname: field.pre_save(obj, False) for field in fields
+        }
+        model._base_manager.using(using).filter(pk=obj.pk).update(**values)
+        obj._state.db = using
+        post_save.send(
+            sender=model, instance=obj, created=False,
+            update_fields=update_fields, raw=False, using=using
+        )
+    return True
@@ -0,0 +1,230 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import (
+    Paginator,
+    Page,
+    EmptyPage,
+    PageNotAnInteger
+)
+from django.db import connections, transaction, DatabaseError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import cached_property
+
+from myadmin.catalog import catalog
+from myadmin.routers import get_replicas
+from myadmin.tracking import is_tracked, models_for
+
+
+EXACT = 'exact'
+ESTIMATE = 'estimate'
+NONE = 'none'
+
+
+def get_count_strategy():
+    """
+    Counting strategy used by paginated views: 'exact' (cached COUNT(*)),
+    'estimate' (database statistics above a threshold) or 'none'.
+    """
+    return getattr(settings, 'MYADMIN_COUNT_STRATEGY', EXACT)
+
+
+def count_cache_key(model, using):
+    # replicas share the count of the default database, which the signals
+    # keep up to date
+    if using in get_replicas():
+        using = DEFAULT_DB_ALIAS
+    return 'myadmin:count:{}:{}'.format(using, model._meta.label_lower)
+
+
+def is_full_table(queryset):
+    """
+    Per-model counts are valid only for unfiltered, unsliced querysets.
+    """
+    query = queryset.query
+    return not (
+        query.has_filters() or query.distinct or
+        query.low_mark or query.high_mark is not None
+    )
+
+
+def exact_count(queryset):
+    """
+    COUNT(*) cached per model and kept up to date by save/delete signals,
+    for the models receiving them (see `tracking`). Counts of a replica
+    may lag behind, they are used but not cached.
+    """
+    if not is_full_table(queryset) or not is_tracked(queryset.model):
+        return queryset.count()
+    key = count_cache_key(queryset.model, queryset.db)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        if queryset.db in get_replicas():
+            return count
+        cache.set(
+            key, count, getattr(settings, 'MYADMIN_COUNT_CACHE_TIMEOUT', 300)
+        )
+    return count
+
+
+def estimated_count(model, using):
+    """
+    Row count taken from the database statistics, None if not available.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        )
+    elif connection.vendor == 'sqlite':
+        # filled in by ANALYZE, the first number of `stat` is the row count
+        sql = (
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = %s '
+            'ORDER BY idx IS NOT NULL LIMIT 1'
+        )
+    else:
+        return None
+    try:
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [table])
+                row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    try:
+        count = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    return count if count >= 0 else None
+
+
+def _update_cached_count(model, using, delta):
+    try:
+        cache.incr(count_cache_key(model, using), delta)
+    except ValueError:
+        pass  # not cached, will be counted on next use
+
+
+def model_saved(sender, created, using, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: _update_cached_count(sender, using, 1), using=using
+        )
+
+
+def model_deleted(sender, using, **kwargs):
+    transaction.on_commit(
+        lambda: _update_cached_count(sender, using, -1), using=using
+    )
+
+
+def model_bulk_saved(sender, using, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: _update_cached_count(sender, using, created), using=using
+        )
+
+
+def models_added(sender, labels, using, **kwargs):
+    for label in labels:
+        try:
+            models = models_for(catalog.get_model(label))
+        except LookupError:
+            continue
+        cache.delete_many([count_cache_key(model, using) for model in models])
+
+
+class CountPage(Page):
+    """
+    Page which knows whether it has a successor without a total count.
+    """
+    def __init__(self, object_list, number, paginator, has_next):
+        super(CountPage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Page %s>' % self.number
+
+    def has_next(self):
+        return self._has_next
+
+    # Page validates these against num_pages, which would count the rows
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CountPaginator(Paginator):
+    """
+    Paginator using `get_count_strategy()` to avoid full COUNT(*) queries.
+
+    `estimated` is True when `count` comes from database statistics and
+    `counted` is False when no count is available at all. In both cases
+    pages are fetched with one extra row to tell if there is a next page.
+    """
+    def __init__(self, object_list, per_page, strategy=None, **kwargs):
+        super(CountPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.strategy = strategy or get_count_strategy()
+        self.counted = self.strategy != NONE
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'model'):
+            return super(CountPaginator, self).count
+        if self.strategy == ESTIMATE and is_full_table(queryset):
+            estimate = estimated_count(queryset.model, queryset.db)
+            threshold = getattr(
+                settings, 'MYADMIN_COUNT_ESTIMATE_THRESHOLD', 100000
+            )
+            if estimate is not None and estimate >= threshold:
+                self.estimated = True
+                return estimate
+        return exact_count(queryset)
+
+    def page(self, number):
+        if self.counted and not (self.count and self.estimated):
+            return super(CountPaginator, self).page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return CountPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        """
+        Like `page`, but falls back to the first or last known page.
+        """
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            if self.counted and not self.estimated:
+                return self.page(self.num_pages)
+            return self.page(1)
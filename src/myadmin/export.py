@@ -0,0 +1,89 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def get_export_chunk_size():
+    return getattr(settings, 'MYADMIN_EXPORT_CHUNK_SIZE', 2000)
+
+
+def get_export_exclude():
+    return getattr(
+        settings, 'MYADMIN_EXPORT_EXCLUDE',
+        getattr(settings, 'MYADMIN_SEARCH_EXCLUDE', ('password',))
+    )
+
+
+def get_export_fields(model, names=None):
+    """
+    Concrete fields to export, all of them if `names` is empty, except
+    the ones named in MYADMIN_EXPORT_EXCLUDE (by default those of
+    MYADMIN_SEARCH_EXCLUDE). Raises LookupError for unknown names.
+    """
+    exclude = get_export_exclude()
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.name not in exclude
+    ]
+    if not names:
+        return fields
+    by_name = {field.name: field for field in fields}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise LookupError('Unknown fields: {}.'.format(', '.join(unknown)))
+    return [by_name[name] for name in names]
+
+
+def iter_rows(queryset, fields, chunk_size=None):
+    """
+    Yield value tuples of `fields` in pk order, chunk by chunk.
+
+    Each chunk is one `WHERE pk > last ORDER BY pk LIMIT chunk_size`
+    query, so memory use does not depend on the table size and, unlike
+    OFFSET, later chunks are as cheap as the first one.
+    """
+    chunk_size = chunk_size or get_export_chunk_size()
+    pk_name = queryset.model._meta.pk.attname
+    columns = [field.attname for field in fields]
+    pk_index = len(columns)
+    queryset = queryset.order_by('pk').values_list(*(columns + [pk_name]))
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield row[:pk_index]
+        if len(rows) < chunk_size:
+            break
+        last = rows[-1][pk_index]
+
+
+class Echo(object):
+    """
+    File-like object returning what is written, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, fields, chunk_size=None):
+    writer = csv.writer(Echo())
+    yield writer.writerow([field.name for field in fields])
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield writer.writerow([
+            '' if value is None else value for value in row
+        ])
+
+
+def stream_jsonl(queryset, fields, chunk_size=None):
+    names = [field.name for field in fields]
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMS = {
+    'csv': (stream_csv, 'text/csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+}
@@ -0,0 +1,258 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import DEFAULT_DB_ALIAS, models
+from django_filters.constants import EMPTY_VALUES
+from django_filters.filters import CharFilter
+from django_filters.filterset import filterset_factory
+
+from myadmin.catalog import catalog
+from myadmin.counts import (
+    ESTIMATE,
+    count_cache_key,
+    estimated_count,
+    get_count_strategy
+)
+
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+RANGE_FIELDS = (
+    models.AutoField, models.IntegerField, models.FloatField,
+    models.DecimalField, models.DateField, models.TimeField
+)  # DateTimeField is a DateField
+
+
+def indexed_fields(model):
+    """
+    Names of the fields an index can be searched by: primary key, unique
+    and db_index columns (foreign keys included) and the first column of
+    composite indexes.
+    """
+    opts = model._meta
+    names = {
+        field.name for field in opts.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    }
+    for fields in list(opts.unique_together) + list(opts.index_together):
+        names.add(fields[0])
+    for index in opts.indexes:
+        names.add(index.fields[0].lstrip('-'))
+    return names
+
+
+def prefix_range(prefix):
+    """
+    `(lower, upper)` bounds of the strings starting with `prefix`.
+
+    A prefix search as a range is an index range scan with any collation,
+    unlike `LIKE 'prefix%'` which most databases can only serve from an
+    index with a C collation or a pattern operator class.
+    """
+    return prefix, prefix + '\uffff'
+
+
+class PrefixFilter(CharFilter):
+    """
+    `__startswith` filter selecting a `prefix_range`.
+    """
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        lower, upper = prefix_range(value)
+        return self.get_method(qs)(**{
+            self.name + '__gte': lower, self.name + '__lt': upper
+        })
+
+
+def get_lookups(field):
+    if field.is_relation:
+        return ['exact', 'in'] if field.many_to_one or field.one_to_one else []
+    if isinstance(field, models.BooleanField):
+        return ['exact']
+    if isinstance(field, TEXT_FIELDS):
+        return ['exact', 'in', 'startswith']
+    if isinstance(field, RANGE_FIELDS):
+        return ['exact', 'in', 'range']
+    return []
+
+
+def known_table_size(model, using=DEFAULT_DB_ALIAS):
+    """
+    Row count of `model` if known without counting, None otherwise.
+    """
+    count = cache.get(count_cache_key(model, using))
+    if count is None and get_count_strategy() == ESTIMATE:
+        count = estimated_count(model, using)
+    return count
+
+
+def allows_unindexed(model, using=DEFAULT_DB_ALIAS):
+    """
+    Unindexed columns can be filtered and sorted on for models listed in
+    MYADMIN_FILTER_UNINDEXED and on tables small enough to be scanned
+    (below MYADMIN_FILTER_SCAN_THRESHOLD rows). Tables of unknown size
+    count as large.
+    """
+    opted_in = {
+        label.lower()
+        for label in getattr(settings, 'MYADMIN_FILTER_UNINDEXED', ())
+    }
+    if model._meta.label_lower in opted_in:
+        return True
+    threshold = getattr(settings, 'MYADMIN_FILTER_SCAN_THRESHOLD', 1000)
+    size = known_table_size(model, using)
+    return size is not None and size < threshold
+
+
+def index_prefixes(model):
+    """
+    Tuples of field names an index returns rows sorted by: indexed
+    columns and the leading columns of composite indexes.
+    """
+    opts = model._meta
+    prefixes = {(name,) for name in indexed_fields(model)}
+    composite = [
+        list(fields)
+        for fields in list(opts.unique_together) + list(opts.index_together)
+    ] + [
+        [name.lstrip('-') for name in index.fields] for index in opts.indexes
+    ]
+    for fields in composite:
+        for end in range(1, len(fields) + 1):
+            prefixes.add(tuple(fields[:end]))
+    return prefixes
+
+
+def get_sort_fields(model, using=DEFAULT_DB_ALIAS, cursor=False):
+    """
+    Names of the fields `model` can be sorted by on their own, see
+    `get_ordering`.
+    """
+    if allows_unindexed(model, using):
+        allowed = None
+    else:
+        allowed = {
+            prefix[0] for prefix in index_prefixes(model) if len(prefix) == 1
+        }
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not (cursor and field.null) and (
+            allowed is None or field.name in allowed
+        )
+    ]
+
+
+def get_ordering(model, value, using=DEFAULT_DB_ALIAS, cursor=False):
+    """
+    `order_by()` arguments for an `?ordering=` value like 'name,-pk',
+    ending with the primary key so pages have a stable order.
+
+    Unless `allows_unindexed`, the fields must be a prefix of an index
+    and sorted in one direction, so the database reads the index instead
+    of sorting the table. For `cursor` pages nullable fields are refused:
+    they are selected by comparing the sort value, which skips rows
+    without one. Raises ValidationError otherwise.
+    """
+    opts = model._meta
+    fields, descending = [], []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        descending.append(name.startswith('-'))
+        name = name[1:] if name.startswith('-') else name
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.many_to_many:
+            raise ValidationError(
+                'Cannot sort by "{}".'.format(name), code='invalid'
+            )
+        if field in fields:
+            raise ValidationError(
+                'Field "{}" is repeated.'.format(name), code='invalid'
+            )
+        if cursor and field.null:
+            raise ValidationError(
+                'Cannot sort by "{}", it may be empty.'.format(name),
+                code='nullable'
+            )
+        fields.append(field)
+    if not fields:
+        raise ValidationError('No fields to sort by.', code='invalid')
+    names = tuple(field.name for field in fields)
+    if not allows_unindexed(model, using) and (
+            names not in index_prefixes(model) or len(set(descending)) > 1):
+        raise ValidationError(
+            'Sorting by {} needs an index.'.format(', '.join(names)),
+            code='unindexed'
+        )
+    # relations are sorted by their column, not the related model
+    ordering = [
+        ('-' if desc else '') + field.attname
+        for field, desc in zip(fields, descending)
+    ]
+    if opts.pk not in fields:
+        ordering.append('-pk' if descending[-1] else 'pk')
+    return ordering
+
+
+def get_filter_fields(model, unindexed=False):
+    """
+    `(name, lookups)` pairs of the fields `model` can be filtered by.
+    """
+    indexed = indexed_fields(model)
+    result = []
+    for field in model._meta.concrete_fields:
+        lookups = get_lookups(field)
+        if lookups and (unindexed or field.name in indexed):
+            result.append((field.name, tuple(lookups)))
+    return tuple(result)
+
+
+def _target_field(field):
+    while field.is_relation:
+        field = field.target_field
+    return field
+
+
+@lru_cache(maxsize=getattr(settings, 'MYADMIN_FILTERSET_CACHE_SIZE', 256))
+def _build_filterset(custom_model, fields, catalog_version):
+    filterset = filterset_factory(
+        custom_model,
+        fields={name: list(lookups) for name, lookups in fields}
+    )
+    opts = custom_model._meta
+    for name, lookups in fields:
+        field = opts.get_field(name)
+        if field.is_relation:
+            # filtered by the key column, rather than a select listing
+            # every row of the related table
+            for lookup in lookups:
+                key = name if lookup == 'exact' else name + '__' + lookup
+                filterset.base_filters[key] = filterset.filter_for_field(
+                    _target_field(field), field.attname, lookup
+                )
+        if 'startswith' in lookups:
+            filterset.base_filters[name + '__startswith'] = PrefixFilter(
+                name=name, lookup_expr='startswith'
+            )
+    return filterset
+
+
+def create_filterset(custom_model, using=DEFAULT_DB_ALIAS):
+    """
+    FilterSet class of `custom_model` with exact/in lookups and, by field
+    type, prefix (`__startswith`, as a `prefix_range`) or `__range`
+    lookups. Relations are filtered by the value of their key.
+
+    Only indexed columns are filterable unless `allows_unindexed`, so a
+    filter cannot make the database scan a large table.
+    """
+    fields = get_filter_fields(
+        custom_model, unindexed=allows_unindexed(custom_model, using)
+    )
+    return _build_filterset(custom_model, fields, catalog.version)
@@ -1,12 +1,202 @@
+import threading
+from functools import lru_cache
+
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
+from django.db import DatabaseError
+
+from myadmin import registry
+from myadmin.catalog import catalog
+from myadmin.filters import TEXT_FIELDS, indexed_fields, known_table_size
+
+
+def get_autocomplete_threshold():
+    return getattr(settings, 'MYADMIN_AUTOCOMPLETE_THRESHOLD', 1000)
+
+
+def is_large(queryset):
+    """
+    Whether `queryset` has more than MYADMIN_AUTOCOMPLETE_THRESHOLD rows.
+    Tables of unknown size are counted up to the threshold only.
+    """
+    threshold = get_autocomplete_threshold()
+    size = known_table_size(queryset.model, queryset.db)
+    if size is None or queryset.query.has_filters():
+        size = queryset.order_by()[:threshold + 1].count()
+    return size > threshold
+
+
+def autocomplete_field(model):
+    """
+    Name of the indexed text field `model` is searched by prefix in
+    autocomplete widgets, from MYADMIN_AUTOCOMPLETE_FIELDS
+    ({'app_label.ModelName': field name}) or the first indexed text
+    field. None if there is none, objects are then found by primary key.
+    """
+    configured = getattr(settings, 'MYADMIN_AUTOCOMPLETE_FIELDS', {})
+    if model._meta.label in configured:
+        return configured[model._meta.label]
+    indexed = indexed_fields(model)
+    for field in model._meta.concrete_fields:
+        if isinstance(field, TEXT_FIELDS) and field.name in indexed:
+            return field.name
+    return None
+
+
+class AutocompleteMixin(object):
+    """
+    Relation widget which renders every choice of small tables, and only
+    the selected ones with a search box fed by the `autocomplete` view
+    when the table is large.
+    """
+    template_name = 'myadmin/widgets/autocomplete.html'
+
+    def __init__(self, model_label, field_name, attrs=None):
+        super(AutocompleteMixin, self).__init__(attrs)
+        self.model_label = model_label
+        self.field_name = field_name
+        self.lazy = False
+
+    def get_context(self, name, value, attrs):
+        queryset = getattr(self.choices, 'queryset', None)
+        self.lazy = queryset is not None and is_large(queryset)
+        context = super(AutocompleteMixin, self).get_context(
+            name, value, attrs
+        )
+        if self.lazy:
+            context['widget']['autocomplete_url'] = reverse(
+                'myadmin:autocomplete', kwargs={
+                    'model_name': self.model_label,
+                    'field_name': self.field_name,
+                }
+            )
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        if not self.lazy:
+            return super(AutocompleteMixin, self).optgroups(
+                name, value, attrs
+            )
+        field = self.choices.field
+        values = [item for item in value if item]
+        options = []
+        if not self.allow_multiple_selected and (
+                field.empty_label is not None):
+            options.append(self.create_option(
+                name, '', field.empty_label, not values, 0
+            ))
+        selected = []
+        if values:
+            key = field.to_field_name or 'pk'
+            try:
+                selected = list(self.choices.queryset.filter(
+                    **{key + '__in': values}
+                ))
+            except (TypeError, ValueError, ValidationError):
+                pass  # invalid data sent back, shown with its error
+        for index, obj in enumerate(selected, len(options)):
+            option_value, label = self.choices.choice(obj)
+            options.append(
+                self.create_option(name, option_value, label, True, index)
+            )
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
 
 
-def create_form(custom_model, *args, **kwargs):
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
+
+def relation_widgets(model):
+    """
+    Autocomplete widgets of the editable relations of `model`.
+    """
+    opts = model._meta
+    widgets = {}
+    for field in opts.concrete_fields + opts.many_to_many:
+        if not field.is_relation or not field.editable:
+            continue
+        widget = (
+            AutocompleteSelectMultiple if field.many_to_many
+            else AutocompleteSelect
+        )
+        widgets[field.name] = widget(opts.label, field.name)
+    return widgets
+
+
+@lru_cache(maxsize=getattr(settings, 'MYADMIN_FORM_CACHE_SIZE', 256))
+def _build_form(custom_model, fields, exclude, catalog_version):
+    meta_attrs = {
+        'model': custom_model, 'exclude': list(exclude),
+        'widgets': relation_widgets(custom_model),
+    }
+    if fields is not None:
+        meta_attrs['fields'] = list(fields)
+
     class ModelForm(forms.ModelForm):
         def __init__(self, *args, **kwargs):
             super(ModelForm, self).__init__(*args, **kwargs)
 
-        class Meta:
-            model = custom_model
-            exclude = []
+        Meta = type('Meta', (object,), meta_attrs)
     return ModelForm
+
+
+def create_form(custom_model, fields=None, exclude=()):
+    """
+    ModelForm class for `custom_model`, relations of large tables are
+    rendered as autocomplete widgets.
+
+    Classes are cached per model and field configuration (bounded by
+    MYADMIN_FORM_CACHE_SIZE) and rebuilt when the model catalog changes.
+    """
+    if fields is not None:
+        fields = tuple(fields)
+    return _build_form(custom_model, fields, tuple(exclude), catalog.version)
+
+
+def prebuild_forms():
+    """
+    Build form classes of all panel models, e.g. when a worker starts.
+    """
+    try:
+        labels = registry.get_labels()
+    except DatabaseError:
+        return  # not migrated yet
+    for label in labels:
+        try:
+            create_form(catalog.get_model(label))
+        except LookupError:
+            continue
+
+
+def prebuild_on_first_request(application):
+    """
+    Wrap the WSGI `application` to run `prebuild_forms` once, on the first
+    request of the worker, rather than when it is imported.
+    """
+    lock = threading.Lock()
+    pending = [True]
+
+    def wrapper(environ, start_response):
+        if pending:
+            with lock:
+                if pending:
+                    pending.pop()
+                    prebuild_forms()
+        return application(environ, start_response)
+    return wrapper
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField()
+    file_format = forms.ChoiceField(
+        choices=[('csv', 'CSV'), ('jsonl', 'JSON lines')]
+    )
+    skip = forms.IntegerField(
+        min_value=0, initial=0, help_text='Rows already imported.'
+    )
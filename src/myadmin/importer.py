@@ -0,0 +1,165 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from myadmin import bulk
+from myadmin.forms import create_form
+
+
+FORMATS = ('csv', 'jsonl')
+
+
+def get_import_batch_size():
+    return getattr(settings, 'MYADMIN_IMPORT_BATCH_SIZE', 1000)
+
+
+def iter_records(fileobj, file_format):
+    """
+    Yield `(row number, dict or error message)` for a binary CSV/JSONL
+    file, reading it line by line.
+    """
+    lines = codecs.iterdecode(fileobj, 'utf-8')
+    if file_format == 'csv':
+        for number, record in enumerate(csv.DictReader(lines), 1):
+            yield number, record
+        return
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, 'Invalid JSON: {}'.format(e)
+            continue
+        if not isinstance(record, dict):
+            record = 'Expected a JSON object.'
+        yield number, record
+
+
+class ImportResult(object):
+    def __init__(self, skipped=0):
+        self.created = 0
+        self.processed = skipped  # rows handled so far, resume from here
+        self.errors = []  # (row number, errors)
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'processed': self.processed,
+            'errors': self.errors,
+        }
+
+
+class Importer(object):
+    """
+    Validates records with the `create_form` fields of `model` and writes
+    them with `bulk_create`, one transaction per batch.
+
+    Unique fields are checked with one query per batch instead of one per
+    row. A batch rejected by the database is retried row by row, so only
+    the offending rows end up in the error report.
+    """
+    def __init__(self, model, batch_size=None):
+        self.model = model
+        self.batch_size = batch_size or get_import_batch_size()
+        base_form = create_form(model, exclude=[
+            field.name for field in model._meta.many_to_many
+        ])
+
+        class ImportForm(base_form):
+            def validate_unique(self):
+                pass  # checked per batch in _check_unique
+
+        self.form_class = ImportForm
+
+    def run(self, records, skip=0, progress=None):
+        """
+        Import `(row number, record)` pairs, ignoring the first `skip`.
+        `progress(result)` is called after each committed batch.
+        """
+        result = ImportResult(skipped=skip)
+        batch = []
+        for number, record in records:
+            if number <= skip:
+                continue
+            batch.append((number, record))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, result)
+                batch = []
+                if progress is not None:
+                    progress(result)
+        if batch:
+            self._import_batch(batch, result)
+            if progress is not None:
+                progress(result)
+        return result
+
+    def _import_batch(self, batch, result):
+        first_error = len(result.errors)
+        rows = []
+        for number, record in batch:
+            if not isinstance(record, dict):
+                result.errors.append((number, {'__all__': [record]}))
+                continue
+            form = self.form_class(data=record)
+            if form.is_valid():
+                rows.append((number, form.save(commit=False)))
+            else:
+                result.errors.append((number, {
+                    name: list(messages)
+                    for name, messages in form.errors.items()
+                }))
+        rows = self._check_unique(rows, result)
+        try:
+            with transaction.atomic():
+                bulk.bulk_create(
+                    self.model, [obj for _, obj in rows], self.batch_size
+                )
+            result.created += len(rows)
+        except IntegrityError:
+            for number, obj in rows:
+                try:
+                    with transaction.atomic():
+                        bulk.bulk_create(self.model, [obj])
+                    result.created += 1
+                except IntegrityError as e:
+                    result.errors.append((number, {'__all__': [str(e)]}))
+        result.errors[first_error:] = sorted(
+            result.errors[first_error:], key=lambda error: error[0]
+        )
+        result.processed = batch[-1][0]
+
+    def _check_unique(self, rows, result):
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if field.unique and not field.primary_key
+        ]
+        invalid = set()
+        for field in fields:
+            values = {}
+            for number, obj in rows:
+                value = getattr(obj, field.attname)
+                if value is None:
+                    continue
+                if value in values:
+                    invalid.add(number)
+                    result.errors.append((number, {
+                        field.name: ['Duplicate value in the file.']
+                    }))
+                values.setdefault(value, number)
+            existing = set()
+            for chunk in bulk.batches(values, self.batch_size):
+                existing.update(self.model._default_manager.filter(
+                    **{'{}__in'.format(field.attname): chunk}
+                ).values_list(field.attname, flat=True))
+            for value in existing:
+                invalid.add(values[value])
+                result.errors.append((values[value], {
+                    field.name: ['Value already exists.']
+                }))
+        return [(number, obj) for number, obj in rows if number not in invalid]
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myadmin.benchmark import SIZES, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a separate test database at each size and measures the '
+        'panel, list, CRUD and API views.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(map(str, SIZES)),
+            help='Comma separated row counts.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--baseline', help='Results of an earlier run to compare with.'
+        )
+        parser.add_argument('--latency-tolerance', type=float, default=0.25)
+        parser.add_argument('--memory-tolerance', type=float, default=0.25)
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the seeded database for the next run.'
+        )
+
+    def handle(self, sizes, repeat, output, baseline=None, keepdb=False,
+               **options):
+        try:
+            sizes = [int(size) for size in sizes.split(',')]
+        except ValueError:
+            raise CommandError('--sizes takes comma separated integers.')
+        if baseline is not None:
+            with open(baseline) as f:
+                baseline = json.load(f)['results']
+
+        def progress(size, name, measurement):
+            if options['verbosity'] > 1:
+                self.stdout.write('{} {}: {}'.format(
+                    size, name, dict(measurement)
+                ))
+
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # large tables do not belong in memory
+            test_settings['NAME'] = os.path.join(
+                tempfile.gettempdir(), 'myadmin_benchmark.sqlite3'
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=options['verbosity'], autoclobber=True, keepdb=keepdb
+        )
+        try:
+            results = run_benchmarks(sizes, repeat, progress)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, options['verbosity'], keepdb
+            )
+
+        thresholds = OrderedDict([
+            ('latency_tolerance', options['latency_tolerance']),
+            ('memory_tolerance', options['memory_tolerance']),
+            ('queries_tolerance', 0),
+        ])
+        regressions = compare(
+            results, baseline or {}, options['latency_tolerance'],
+            options['memory_tolerance']
+        )
+        with open(output, 'w') as f:
+            json.dump(OrderedDict([
+                ('thresholds', thresholds),
+                ('results', results),
+                ('regressions', regressions),
+            ]), f, indent=2)
+        self.stdout.write('Results written to {}.'.format(output))
+        if regressions:
+            raise CommandError('Regressions:\n' + '\n'.join(regressions))
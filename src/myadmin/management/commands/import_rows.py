@@ -0,0 +1,49 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myadmin.catalog import catalog
+from myadmin.importer import FORMATS, Importer, iter_records
+
+
+class Command(BaseCommand):
+    help = 'Imports rows of a CSV or JSON lines file into a model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_name', help='Model as app_label.Model')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, dest='file_format')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--skip', type=int, default=0,
+            help='Number of rows already imported, to resume an import.'
+        )
+
+    def handle(self, model_name, path, file_format=None, batch_size=None,
+               skip=0, **options):
+        try:
+            model = catalog.get_model(model_name)
+        except LookupError as e:
+            raise CommandError(str(e))
+        file_format = file_format or os.path.splitext(path)[1].lstrip('.')
+        if file_format not in FORMATS:
+            raise CommandError('Unknown format, use --format.')
+
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write('{} rows processed'.format(result.processed))
+
+        importer = Importer(model, batch_size=batch_size)
+        with open(path, 'rb') as fileobj:
+            result = importer.run(
+                iter_records(fileobj, file_format), skip=skip,
+                progress=progress
+            )
+        for number, errors in result.errors:
+            for name, messages in errors.items():
+                self.stderr.write('Row {}: {}: {}'.format(
+                    number, name, ' '.join(messages)
+                ))
+        self.stdout.write('{} rows created, {} rows processed.'.format(
+            result.created, result.processed
+        ))
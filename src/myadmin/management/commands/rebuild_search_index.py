@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from myadmin import registry
+from myadmin.catalog import catalog
+from myadmin.search import get_backend, pending_labels, reindex
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index of the panel models.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label.Model',
+            help='Models to reindex, all panel models by default.'
+        )
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='Only index the models added to the panel since their '
+                 'last indexing.'
+        )
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, labels, batch_size=None, database=DEFAULT_DB_ALIAS,
+               pending=False, **options):
+        backend = get_backend(database)
+        backend.install()
+        if pending:
+            labels = pending_labels(database)
+            if not labels:
+                return
+        try:
+            models = [
+                catalog.get_model(label)
+                for label in labels or registry.get_labels()
+            ]
+        except LookupError as e:
+            raise CommandError(str(e))
+        if not labels:
+            backend.clear()  # also drops models removed from the panel
+
+        for model in models:
+            label = model._meta.label
+            indexed = 0
+            for indexed in reindex(backend, model, batch_size):
+                if options['verbosity'] > 1:
+                    self.stdout.write('{}: {}'.format(label, indexed))
+            self.stdout.write('{}: {} objects indexed.'.format(label, indexed))
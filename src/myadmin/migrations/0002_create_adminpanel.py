@@ -11,14 +11,14 @@ def create_adminpanel_forwards_func(apps, schema_editor):
     """
     Create object for AdminPanel.
     """
-    AdminPanel.objects.create()
+    AdminPanel.objects.using(schema_editor.connection.alias).create()
 
 
 def create_adminpanel_backwards_func(apps, schema_editor):
     """
     Delete all objects of AdminPanel
     """
-    AdminPanel.objects.all().delete()
+    AdminPanel.objects.using(schema_editor.connection.alias).delete()
 
 
 class Migration(migrations.Migration):
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-18 20:10
+from __future__ import unicode_literals
+
+import json
+
+from django.apps import apps as global_apps
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_models_text_forwards_func(apps, schema_editor):
+    """
+    Move models stored as JSON in AdminPanel.models_text to PanelModel rows.
+    """
+    AdminPanel = apps.get_model('myadmin', 'AdminPanel')
+    PanelModel = apps.get_model('myadmin', 'PanelModel')
+    db_alias = schema_editor.connection.alias
+    labels = {
+        str(model): model._meta.label for model in global_apps.get_models()
+    }
+    for panel in AdminPanel.objects.using(db_alias):
+        if not panel.models_text:
+            continue
+        existing = [
+            labels[name] for name in json.loads(panel.models_text)
+            if name in labels
+        ]
+        PanelModel.objects.using(db_alias).bulk_create([
+            PanelModel(panel=panel, label=label, position=position)
+            for position, label in enumerate(existing)
+        ])
+
+
+def copy_models_text_backwards_func(apps, schema_editor):
+    """
+    Store PanelModel rows as JSON in AdminPanel.models_text.
+    """
+    AdminPanel = apps.get_model('myadmin', 'AdminPanel')
+    for panel in AdminPanel.objects.using(schema_editor.connection.alias):
+        models_names = []
+        for label in panel.panel_models.values_list('label', flat=True):
+            try:
+                models_names.append(str(global_apps.get_model(label)))
+            except LookupError:
+                continue
+        panel.models_text = json.dumps(models_names) if models_names else ''
+        panel.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myadmin', '0004_auto_20170826_1621'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PanelModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=255)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('panel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='panel_models', to='myadmin.AdminPanel')),
+            ],
+            options={
+                'ordering': ('position', 'pk'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='panelmodel',
+            unique_together=set([('panel', 'label')]),
+        ),
+        migrations.RunPython(
+            code=copy_models_text_forwards_func,
+            reverse_code=copy_models_text_backwards_func,
+        ),
+        migrations.RemoveField(
+            model_name='adminpanel',
+            name='models_text',
+        ),
+    ]
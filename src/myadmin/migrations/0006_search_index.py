@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from myadmin.search import get_backend
+    get_backend(schema_editor.connection.alias).install()
+
+
+def uninstall_search_index(apps, schema_editor):
+    from myadmin.search import get_backend
+    get_backend(schema_editor.connection.alias).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myadmin', '0005_panelmodel'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
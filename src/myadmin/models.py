@@ -2,12 +2,32 @@ from django.db import models
 
 
 class AdminPanel(models.Model):
-    models_text = models.TextField(default='', blank=True)
 
     def __str__(self):
-        return 'Models:{:.80}'.format(str(self.models_text))
+        labels = ', '.join(
+            self.panel_models.values_list('label', flat=True)
+        )
+        return 'Models:{:.80}'.format(labels)
 
     class Meta:
         permissions = (
             ('access_panel', 'Can access myadmin panel'),
         )
+
+
+class PanelModel(models.Model):
+    """
+    Model registered in the admin panel, one row per model.
+    """
+    panel = models.ForeignKey(
+        AdminPanel, related_name='panel_models', on_delete=models.CASCADE
+    )
+    label = models.CharField(max_length=255)
+    position = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.label
+
+    class Meta:
+        ordering = ('position', 'pk')
+        unique_together = (('panel', 'label'),)
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from myadmin.routers import current_replica, use_replica
+
+
+_lock = threading.Lock()
+_executor = {'workers': 0, 'pool': None}
+
+
+def get_workers():
+    """
+    Size of the panel thread pool, 0 (the default) runs sequentially.
+    """
+    return getattr(settings, 'MYADMIN_PANEL_WORKERS', 0)
+
+
+def get_timeout():
+    return getattr(settings, 'MYADMIN_PANEL_TIMEOUT', 5)
+
+
+def get_executor():
+    """
+    Pool shared by all requests of the process, so the number of extra
+    database connections stays bounded by MYADMIN_PANEL_WORKERS.
+    """
+    workers = get_workers()
+    with _lock:
+        if _executor['workers'] != workers:
+            if _executor['pool'] is not None:
+                _executor['pool'].shutdown(wait=False)
+            _executor.update(
+                workers=workers,
+                pool=ThreadPoolExecutor(max_workers=workers)
+            )
+        return _executor['pool']
+
+
+def _call(func, args, replica):
+    # workers use their own connections (connections are per thread),
+    # released like at the end of a request, and read from the replica
+    # of the request
+    try:
+        with use_replica(replica):
+            return func(*args)
+    finally:
+        close_old_connections()
+
+
+def run_parallel(func, arguments, timeout=None):
+    """
+    `func(*args)` for each of `arguments` on the shared pool.
+
+    Results are returned in the order of `arguments`; calls which did not
+    finish within `timeout` seconds (shared by all calls) are None and
+    keep running in the background.
+    """
+    pool = get_executor()
+    replica = current_replica()
+    futures = [
+        pool.submit(_call, func, args, replica) for args in arguments
+    ]
+    wait(futures, timeout=get_timeout() if timeout is None else timeout)
+    return [
+        future.result() if future.done() else None for future in futures
+    ]
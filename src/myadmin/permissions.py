@@ -0,0 +1,137 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+
+from myadmin.catalog import catalog
+
+
+ACCESS_PANEL = 'myadmin.access_panel'
+GLOBAL_VERSION_KEY = 'myadmin:perms:version'
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def user_version_key(user_pk):
+    return 'myadmin:perms:version:{}'.format(user_pk)
+
+
+def resolves_permissions():
+    """
+    Whether the permissions are only granted by ModelBackend, which
+    `load_permissions` resolves the same way. With other backends the
+    checks go through `User.has_perm`.
+    """
+    return list(settings.AUTHENTICATION_BACKENDS) == [MODEL_BACKEND]
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def load_permissions(user):
+    """
+    'app_label.codename' of all permissions of `user`, given directly or
+    through groups, in a single query.
+    """
+    return frozenset(
+        '{}.{}'.format(app_label, codename)
+        for app_label, codename in Permission.objects.filter(
+            Q(user=user) | Q(group__user=user)
+        ).values_list(
+            'content_type__app_label', 'codename'
+        ).order_by().distinct()
+    )
+
+
+def get_permissions(user):
+    """
+    Permission set of `user`, kept on the user object for the request and
+    in the shared cache until the permissions of the user or any group
+    change.
+    """
+    perms = getattr(user, '_myadmin_perms', None)
+    if perms is not None:
+        return perms
+    if not resolves_permissions():
+        perms = frozenset(user.get_all_permissions())
+        user._myadmin_perms = perms
+        return perms
+    key = 'myadmin:perms:{}:{}:{}'.format(
+        user.pk, _get_version(GLOBAL_VERSION_KEY),
+        _get_version(user_version_key(user.pk))
+    )
+    perms = cache.get(key)
+    if perms is None:
+        perms = load_permissions(user)
+        cache.set(
+            key, perms,
+            getattr(settings, 'MYADMIN_PERMISSION_CACHE_TIMEOUT', 3600)
+        )
+    user._myadmin_perms = perms
+    return perms
+
+
+def has_perm(user, perm):
+    if not user or not user.is_authenticated or not user.is_active:
+        return False
+    if not resolves_permissions():
+        return user.has_perm(perm)
+    if user.is_superuser:
+        return True
+    return perm in get_permissions(user)
+
+
+def can(user, action, model):
+    """
+    Whether `user` may 'add', 'change' or 'delete' objects of `model`
+    (a model class or 'app_label.ModelName').
+    """
+    return has_perm(user, catalog.get(model).perms[action])
+
+
+def can_label(user, action, label):
+    """
+    `can` for an 'app_label.ModelName' which may not name a model, checked
+    without looking it up so unknown models are denied like known ones.
+    """
+    app_label, _, model_name = label.partition('.')
+    return has_perm(user, '{}.{}_{}'.format(
+        app_label.lower(), action, model_name.lower()
+    ))
+
+
+def can_any(user, model):
+    return any(
+        can(user, action, model) for action in ('add', 'change', 'delete')
+    )
+
+
+def invalidate_user(user_pk):
+    cache.set(user_version_key(user_pk), uuid.uuid4().hex, None)
+
+
+def invalidate_all():
+    cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def permissions_changed(sender, instance, action, reverse, **kwargs):
+    """
+    m2m_changed of user permissions, user groups and group permissions.
+    """
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, get_user_model()):
+        invalidate_user(instance.pk)
+    else:
+        invalidate_all()  # a group or a permission, may affect any user
+
+
+def group_or_permission_deleted(sender, **kwargs):
+    invalidate_all()
@@ -0,0 +1,183 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.urlresolvers import resolve, Resolver404
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+
+logger = logging.getLogger('myadmin')
+
+# model -> (relations loaded by its __str__, found by probing an instance
+# with its nullable relations set, time to probe again or None)
+_display_relations = {}
+
+
+def _loaded_relations(instance, prefix='', depth=0):
+    for field in instance._meta.concrete_fields:
+        if not (field.many_to_one or field.one_to_one):
+            continue
+        related = instance.__dict__.get(field.get_cache_name())
+        if related is None:
+            continue
+        path = prefix + field.name
+        yield path
+        if depth < getattr(settings, 'MYADMIN_PLANNER_DEPTH', 2):
+            for nested in _loaded_relations(related, path + '__', depth + 1):
+                yield nested
+
+
+def _probe_instance(model):
+    """
+    An instance with its nullable forward relations set, so `__str__` can
+    follow them, and whether all of them could be set.
+
+    Each relation is set to a value found on its own through the index of
+    its column: finding a row with all of them set could scan the table.
+    """
+    manager = model._default_manager
+    instance = manager.first()
+    if instance is None:
+        return None, False
+    complete = True
+    for field in model._meta.concrete_fields:
+        if not ((field.many_to_one or field.one_to_one) and field.null):
+            continue
+        if getattr(instance, field.attname) is not None:
+            continue
+        found = []
+        if field.db_index:
+            found = list(manager.filter(**{
+                field.attname + '__isnull': False
+            }).order_by().values_list(field.attname, flat=True)[:1])
+        if found:
+            setattr(instance, field.attname, found[0])
+        else:
+            complete = False
+    return instance, complete
+
+
+def display_relations(model, probe=True):
+    """
+    Forward relations that `str()` of `model` instances follows. Without
+    `probe` only relations found by an earlier probe are returned.
+
+    Results of complete probes are kept for good. When a relation could
+    not be set, `str()` failed or there was no row yet, the result is kept
+    for MYADMIN_PLANNER_PROBE_TIMEOUT seconds before probing again.
+    """
+    relations, expires = _display_relations.get(model, ((), 0))
+    if not probe or expires is None or expires > time.time():
+        return relations
+    instance, complete = _probe_instance(model)
+    relations = ()
+    if instance is not None:
+        try:
+            str(instance)
+        except Exception:
+            logger.debug('Probing %s.__str__ failed', model, exc_info=True)
+            complete = False
+        else:
+            relations = tuple(_loaded_relations(instance))
+    expires = None
+    if not complete:
+        expires = time.time() + getattr(
+            settings, 'MYADMIN_PLANNER_PROBE_TIMEOUT', 3600
+        )
+    _display_relations[model] = (relations, expires)
+    return relations
+
+
+def plan_for_display(queryset):
+    """
+    Add select_related for the relations rendered by `__str__`.
+    """
+    relations = display_relations(queryset.model)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset
+
+
+def plan_for_serializer(queryset, serializer_class):
+    """
+    Add select_related/prefetch_related for the serialized relations.
+
+    Primary key related fields only read the foreign key column, so only
+    nested serializers need a join and many-to-many fields a prefetch.
+    """
+    select, prefetch = [], []
+    for name, field in serializer_class().fields.items():
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(field.source)
+        elif isinstance(field, serializers.ListSerializer):
+            prefetch.append(field.source)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(field.source)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(sql):
+    return _literals.sub('?', sql)
+
+
+def find_repeated_queries(queries, threshold):
+    counter = Counter(normalize_sql(query['sql']) for query in queries)
+    return [
+        (sql, count) for sql, count in counter.most_common()
+        if count >= threshold
+    ]
+
+
+@contextmanager
+def detect_n_plus_one(name='', threshold=None, raise_exception=None,
+                      using=DEFAULT_DB_ALIAS):
+    """
+    Log (or raise NPlusOneError for) queries which only differ in their
+    parameters and run at least `threshold` times inside the block.
+    """
+    if threshold is None:
+        threshold = getattr(settings, 'MYADMIN_NPLUSONE_THRESHOLD', 5)
+    if raise_exception is None:
+        raise_exception = getattr(settings, 'MYADMIN_NPLUSONE_RAISE', False)
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    for sql, count in find_repeated_queries(
+            context.captured_queries, threshold):
+        message = 'N+1 queries in {}: {} x {}'.format(name, count, sql)
+        if raise_exception:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+class NPlusOneMiddleware(object):
+    """
+    Opt-in N+1 detection for views of the `myadmin` namespace.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            match = None
+        if match is None or 'myadmin' not in match.namespaces:
+            return self.get_response(request)
+        with detect_n_plus_one(match.view_name):
+            return self.get_response(request)
@@ -0,0 +1,97 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+
+from myadmin.models import AdminPanel, PanelModel
+from myadmin.signals import panel_changed, panel_models_added
+
+
+VERSION_KEY = 'myadmin:registry:version'
+
+# Process-local copy of the registered labels, valid as long as its version
+# matches the stamp in the default cache. That cache must be shared by all
+# workers (not LocMemCache), see the myadmin.W001 deploy check.
+_registry = {'version': None, 'labels': ()}
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """
+    Make every process reload the registry on its next read.
+    """
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_panel():
+    panel = AdminPanel.objects.using(DEFAULT_DB_ALIAS).first()
+    if panel is None:
+        panel = AdminPanel.objects.create()
+    return panel
+
+
+def get_labels():
+    """
+    Labels ('app_label.ModelName') of the panel models in their order,
+    always read from the default database: they are kept for the current
+    version, which a replica may not have caught up with.
+    """
+    version = get_version()
+    if _registry['version'] != version or version is None:
+        labels = tuple(
+            get_panel().panel_models.using(DEFAULT_DB_ALIAS).values_list(
+                'label', flat=True
+            )
+        )
+        _registry.update(version=version, labels=labels)
+    return _registry['labels']
+
+
+def add_models(labels):
+    with transaction.atomic():
+        panel = get_panel()
+        existing = set(panel.panel_models.values_list('label', flat=True))
+        position = panel.panel_models.aggregate(
+            position=Max('position')
+        )['position']
+        position = -1 if position is None else position
+        new_models = []
+        for label in labels:
+            if label in existing:
+                continue
+            existing.add(label)
+            position += 1
+            new_models.append(
+                PanelModel(panel=panel, label=label, position=position)
+            )
+        PanelModel.objects.bulk_create(new_models)
+        if new_models:
+            panel_models_added.send(
+                sender=PanelModel, using=PanelModel.objects.db,
+                labels=[obj.label for obj in new_models]
+            )
+    _changed()
+
+
+def remove_models(labels):
+    with transaction.atomic():
+        PanelModel.objects.filter(
+            panel=get_panel(), label__in=labels
+        ).delete()
+    _changed()
+
+
+def _changed():
+    # once for the current transaction and once more when it is committed,
+    # so no process can keep rows read before the commit
+    invalidate()
+    transaction.on_commit(invalidate)
+    panel_changed.send(sender=PanelModel)
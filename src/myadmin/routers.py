@@ -0,0 +1,117 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.urlresolvers import resolve, Resolver404
+from django.db import DEFAULT_DB_ALIAS
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+REPLICA_VIEWS = (
+    'myadmin:panel', 'myadmin:objects',
+    'myadmin:model-list', 'myadmin:model-detail',
+)
+
+_local = threading.local()
+
+
+def get_replicas():
+    """
+    Aliases of the read replicas of the default database.
+    """
+    return getattr(settings, 'MYADMIN_REPLICAS', [])
+
+
+def current_replica():
+    return getattr(_local, 'replica', None)
+
+
+@contextmanager
+def use_replica(alias):
+    """
+    Route reads of the current thread to the replica `alias` (None for
+    the default database) within the block.
+    """
+    previous = current_replica()
+    _local.replica = alias
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+class ReplicaRouter(object):
+    """
+    Sends reads to the replica chosen by `use_replica`, except for the
+    apps of MYADMIN_REPLICA_EXCLUDE (sessions and users by default, so a
+    login is never lost to replication lag). Writes always go to the
+    default database.
+    """
+    def db_for_read(self, model, **hints):
+        alias = current_replica()
+        exclude = getattr(
+            settings, 'MYADMIN_REPLICA_EXCLUDE', ('sessions', 'auth')
+        )
+        if alias is None or model._meta.app_label in exclude:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # objects read from a replica are saved to the default database
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in get_replicas():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS} | set(get_replicas())
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+
+class ReplicaMiddleware(object):
+    """
+    Opt-in routing of the panel, list and API reads to a replica of
+    MYADMIN_REPLICAS, one per request.
+
+    After a successful write through a `myadmin` view, reads of the
+    client stick to the default database for MYADMIN_REPLICA_PIN_SECONDS,
+    tracked by a cookie, so users see their own changes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_pin_cookie(self):
+        return getattr(
+            settings, 'MYADMIN_REPLICA_PIN_COOKIE', 'myadmin_primary'
+        )
+
+    def __call__(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            match = None
+        replicas = get_replicas()
+        if match is None or 'myadmin' not in match.namespaces or (
+            not replicas
+        ):
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                response.set_cookie(
+                    self.get_pin_cookie(), '1', max_age=getattr(
+                        settings, 'MYADMIN_REPLICA_PIN_SECONDS', 15
+                    ), httponly=True
+                )
+            return response
+        if match.view_name not in REPLICA_VIEWS or (
+            self.get_pin_cookie() in request.COOKIES
+        ):
+            return self.get_response(request)
+        # template responses are rendered before they get here
+        with use_replica(random.choice(replicas)):
+            return self.get_response(request)
@@ -0,0 +1,350 @@
+import abc
+import re
+from collections import namedtuple
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models, transaction, DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+
+from myadmin import registry
+from myadmin.catalog import catalog
+from myadmin.export import get_export_chunk_size
+
+
+SearchResult = namedtuple('SearchResult', ['label', 'pk', 'snippet'])
+
+_words = re.compile(r'\w+', re.UNICODE)
+
+
+def get_search_limit():
+    return getattr(settings, 'MYADMIN_SEARCH_RESULTS', 50)
+
+
+def search_fields(model):
+    """
+    Names of the text fields of `model` which are indexed, except the
+    ones named in MYADMIN_SEARCH_EXCLUDE (passwords by default).
+    """
+    exclude = getattr(settings, 'MYADMIN_SEARCH_EXCLUDE', ('password',))
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if isinstance(field, (models.CharField, models.TextField)) and
+        not field.choices and field.name not in exclude
+    ]
+
+
+def document(obj, fields):
+    return '\n'.join(
+        str(value) for value in (getattr(obj, name) for name in fields)
+        if value
+    )
+
+
+class BaseSearchBackend(metaclass=abc.ABCMeta):
+    """
+    Full-text index of the panel models in database `using`.
+
+    Backends without an index of their own only implement `search`.
+    """
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def install(self):
+        pass
+
+    def uninstall(self):
+        pass
+
+    def index(self, model, objs):
+        """
+        Add or replace the documents of `objs`.
+        """
+
+    def remove(self, model, pks):
+        pass
+
+    def clear(self, label=None):
+        """
+        Remove the documents of `label`, of all models if None.
+        """
+
+    @abc.abstractmethod
+    def search(self, query, labels, limit=None):
+        """
+        SearchResults for `query` in the models of `labels`, best first.
+        """
+
+
+class ScanSearchBackend(BaseSearchBackend):
+    """
+    No index, every search is an `icontains` query per model. Fallback
+    for databases without a full-text backend.
+    """
+    def search(self, query, labels, limit=None):
+        limit = limit or get_search_limit()
+        words = _words.findall(query)
+        results = []
+        for label in labels:
+            if not words or len(results) >= limit:
+                break
+            model = catalog.get_model(label)
+            fields = search_fields(model)
+            if not fields:
+                continue
+            condition = reduce(lambda a, b: a & b, [
+                reduce(lambda a, b: a | b, [
+                    models.Q(**{name + '__icontains': word})
+                    for name in fields
+                ]) for word in words
+            ])
+            queryset = model._default_manager.using(self.using).filter(
+                condition
+            ).values_list('pk', flat=True)
+            results.extend(
+                SearchResult(label, str(pk), '')
+                for pk in queryset[:limit - len(results)]
+            )
+        return results
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index.
+
+    `myadmin_search_doc` maps (label, object pk) to the rowid of the
+    document in the `myadmin_search` FTS5 table, so documents are
+    replaced and removed by rowid.
+    """
+    doc_table = 'myadmin_search_doc'
+    fts_table = 'myadmin_search'
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE IF NOT EXISTS {} ('
+                'id INTEGER PRIMARY KEY, label TEXT NOT NULL, '
+                'object_pk TEXT NOT NULL, UNIQUE (label, object_pk))'
+                .format(self.doc_table)
+            )
+            cursor.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS {} '
+                "USING fts5(body, tokenize='unicode61')"
+                .format(self.fts_table)
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(self.fts_table))
+            cursor.execute('DROP TABLE IF EXISTS {}'.format(self.doc_table))
+
+    def _doc_ids(self, cursor, label, pks):
+        ids = {}
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            cursor.execute(
+                'SELECT object_pk, id FROM {} WHERE label = %s AND '
+                'object_pk IN ({})'.format(
+                    self.doc_table, ', '.join(['%s'] * len(chunk))
+                ),
+                [label] + chunk
+            )
+            ids.update(cursor.fetchall())
+        return ids
+
+    def _delete_docs(self, cursor, ids):
+        ids = [[doc_id] for doc_id in ids]
+        cursor.executemany(
+            'DELETE FROM {} WHERE rowid = %s'.format(self.fts_table), ids
+        )
+        cursor.executemany(
+            'DELETE FROM {} WHERE id = %s'.format(self.doc_table), ids
+        )
+
+    def index(self, model, objs):
+        fields = search_fields(model)
+        objs = [obj for obj in objs if obj.pk is not None]
+        if not fields or not objs:
+            return
+        label = model._meta.label
+        documents = {str(obj.pk): document(obj, fields) for obj in objs}
+        pks = list(documents)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO {} (label, object_pk) '
+                'VALUES (%s, %s)'.format(self.doc_table),
+                [[label, pk] for pk in pks]
+            )
+            ids = self._doc_ids(cursor, label, pks)
+            cursor.executemany(
+                'DELETE FROM {} WHERE rowid = %s'.format(self.fts_table),
+                [[doc_id] for doc_id in ids.values()]
+            )
+            cursor.executemany(
+                'INSERT INTO {} (rowid, body) VALUES (%s, %s)'.format(
+                    self.fts_table
+                ),
+                [[ids[pk], documents[pk]] for pk in pks]
+            )
+
+    def remove(self, model, pks):
+        with self.connection.cursor() as cursor:
+            ids = self._doc_ids(
+                cursor, model._meta.label, [str(pk) for pk in pks]
+            )
+            self._delete_docs(cursor, ids.values())
+
+    def clear(self, label=None):
+        with self.connection.cursor() as cursor:
+            if label is None:
+                cursor.execute('DELETE FROM {}'.format(self.fts_table))
+                cursor.execute('DELETE FROM {}'.format(self.doc_table))
+                return
+            cursor.execute(
+                'DELETE FROM {} WHERE rowid IN '
+                '(SELECT id FROM {} WHERE label = %s)'.format(
+                    self.fts_table, self.doc_table
+                ),
+                [label]
+            )
+            cursor.execute(
+                'DELETE FROM {} WHERE label = %s'.format(self.doc_table),
+                [label]
+            )
+
+    def match_expression(self, query):
+        """
+        All words of `query`, quoted, the last one as a prefix.
+        """
+        words = ['"{}"'.format(word) for word in _words.findall(query)]
+        if words:
+            words[-1] += '*'
+        return ' '.join(words)
+
+    def search(self, query, labels, limit=None):
+        expression = self.match_expression(query)
+        if not expression or not labels:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT d.label, d.object_pk, "
+                "snippet({fts}, 0, '', '', '...', 12) "
+                "FROM {fts} JOIN {doc} d ON d.id = {fts}.rowid "
+                "WHERE {fts} MATCH %s AND d.label IN ({labels}) "
+                "ORDER BY rank LIMIT %s".format(
+                    fts=self.fts_table, doc=self.doc_table,
+                    labels=', '.join(['%s'] * len(labels))
+                ),
+                [expression] + list(labels) + [limit or get_search_limit()]
+            )
+            return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """
+    MYADMIN_SEARCH_BACKEND (dotted path) for database `using`, by default
+    FTS5 on SQLite and ScanSearchBackend elsewhere.
+    """
+    path = getattr(settings, 'MYADMIN_SEARCH_BACKEND', None)
+    if path is None:
+        if connections[using].vendor == 'sqlite':
+            path = 'myadmin.search.SQLiteSearchBackend'
+        else:
+            path = 'myadmin.search.ScanSearchBackend'
+    return import_string(path)(using)
+
+
+def search(query, labels=None, limit=None, using=DEFAULT_DB_ALIAS):
+    """
+    Search the panel models (or `labels`), results of models which are
+    no longer installed are skipped.
+    """
+    if labels is None:
+        labels = registry.get_labels()
+    labels = [label for label in labels if label in catalog]
+    return get_backend(using).search(query, labels, limit)
+
+
+def reindex(backend, model, batch_size=None):
+    """
+    Replace the documents of `model` by its current rows, in batches of
+    `batch_size` rows each in its own transaction. Yields the number of
+    objects indexed so far after each batch, the model is no longer
+    pending once done.
+    """
+    using = backend.using
+    batch_size = batch_size or get_export_chunk_size()
+    with transaction.atomic(using=using):
+        backend.clear(model._meta.label)
+    fields = search_fields(model)
+    queryset = model._default_manager.using(using).only(
+        *fields
+    ).order_by('pk')
+    indexed, last = 0, None
+    while fields:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        objs = list(chunk[:batch_size])
+        with transaction.atomic(using=using):
+            backend.index(model, objs)
+        indexed += len(objs)
+        yield indexed
+        if len(objs) < batch_size:
+            break
+        last = objs[-1].pk
+    cache.delete(pending_key(model._meta.label, using))
+
+
+def _indexed(model):
+    try:
+        catalog.get(model)
+    except LookupError:
+        return False  # e.g. historical models of migrations
+    return bool(search_fields(model)) and (
+        model._meta.label in registry.get_labels()
+    )
+
+
+def object_saved(sender, instance, using, raw=False, **kwargs):
+    # written on the same connection, so rolled back with the change
+    if not raw and _indexed(sender):
+        get_backend(using).index(sender, [instance])
+
+
+def object_deleted(sender, instance, using, **kwargs):
+    if _indexed(sender):
+        get_backend(using).remove(sender, [instance.pk])
+
+
+def objects_bulk_saved(sender, using, objs=(), **kwargs):
+    # objects without pk (bulk inserts on databases which do not return
+    # it) are only picked up by the rebuild_search_index command
+    if _indexed(sender):
+        get_backend(using).index(sender, objs)
+
+
+def pending_key(label, using):
+    return 'myadmin:search:pending:{}:{}'.format(using, label.lower())
+
+
+def pending_labels(using=DEFAULT_DB_ALIAS):
+    """
+    Panel models added since their last `reindex`, whose older rows are
+    not in the index yet.
+    """
+    labels = registry.get_labels()
+    pending = cache.get_many([pending_key(label, using) for label in labels])
+    return [
+        label for label in labels if pending_key(label, using) in pending
+    ]
+
+
+def models_added(sender, labels, using, **kwargs):
+    # rows written while the model was not in the panel were not indexed;
+    # indexing a large table takes the rebuild_search_index command, it
+    # cannot be done in the request adding the model
+    cache.set_many({pending_key(label, using): True for label in labels}, None)
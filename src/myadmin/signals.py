@@ -0,0 +1,15 @@
+from django.dispatch import Signal
+
+
+# Sent after rows of `sender` were written without post_save signals
+# (bulk_create or bulk update). `created` is the number of new rows and
+# `objs` the written objects, without pk if the database did not return it.
+bulk_saved = Signal(providing_args=['using', 'created', 'objs'])
+
+# Sent when the models of `labels` were added to the panel, within the
+# transaction adding them to the registry in database `using`.
+panel_models_added = Signal(providing_args=['labels', 'using'])
+
+# Sent by `registry` once the panel models changed, in the process which
+# changed them (the others see it on their next read of the registry).
+panel_changed = Signal()
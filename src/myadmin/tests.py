@@ -1,36 +1,208 @@
-from django.contrib.auth.models import User, Permission
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
-from django.test import TestCase
+from django.db import connection
+from django.db.models import ProtectedError
+from django.db.models.deletion import Collector
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    RequestFactory,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
 
-from myadmin.models import AdminPanel
+from myadmin.counts import CountPaginator, count_cache_key
+from myadmin import (
+    benchmark,
+    bulk,
+    concurrency,
+    export,
+    planner,
+    registry,
+    search,
+    timing,
+    tracking,
+    versions,
+)
+from myadmin.api.serializers import GeneralSerializer, create_serializer
+from myadmin.catalog import catalog
+from myadmin.checks import check_shared_cache
+from myadmin.filters import (
+    create_filterset,
+    get_ordering,
+    get_sort_fields,
+    indexed_fields,
+)
+from myadmin.forms import create_form, prebuild_on_first_request
+from myadmin.importer import Importer, iter_records
+from myadmin.planner import (
+    NPlusOneError,
+    detect_n_plus_one,
+    display_relations,
+    plan_for_display,
+    plan_for_serializer
+)
+from myadmin.models import AdminPanel, PanelModel
+from myadmin.permissions import can, get_permissions
+from myadmin.routers import use_replica
+from myadmin.views import AdminPanelView, AutocompleteView
+from testapp.models import (
+    BenchCategory,
+    BenchLock,
+    BenchRelated,
+    BenchWide,
+    TestComment,
+    TestModel1,
+    TestModel2
+)
 
 
 class CustomAdminPanelModelTestCase(TestCase):
     def setUp(self):
-        self.panel1 = AdminPanel.objects.create(models_text='Short text')
-        self.panel2 = AdminPanel.objects.create(
-            models_text="""
-                Very Long Text. Very Long Text.
-                Very Long Text. Very Long Text.
-                Very Long Text. Very Long Text.
-                Very Long Text. Very Long Text.
-                Very Long Text. Very Long Text.
-                Very Long Text. Very Long Text.
-            """
-        )
+        self.panel1 = AdminPanel.objects.create()
+        self.panel1.panel_models.create(label='testapp.TestModel1')
+        self.panel2 = AdminPanel.objects.create()
+        for position in range(10):
+            self.panel2.panel_models.create(
+                label='testapp.VeryLongModelName{}'.format(position),
+                position=position
+            )
 
     def test_methods(self):
-        self.assertEqual(self.panel1.__str__(), 'Models:Short text')
+        self.assertEqual(self.panel1.__str__(), 'Models:testapp.TestModel1')
         self.assertEqual(
             self.panel2.__str__(),
-            """Models:
-                Very Long Text. Very Long Text.
-                Very Long Text."""
+            'Models:testapp.VeryLongModelName0, testapp.VeryLongModelName1, '
+            'testapp.VeryLongModelNam'
+        )
+
+
+class PanelRegistryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_registry(self):
+        registry.add_models(['testapp.TestModel2', 'auth.User'])
+        registry.add_models(['auth.User', 'testapp.TestModel1'])
+        self.assertEqual(
+            registry.get_labels(),
+            ('testapp.TestModel2', 'auth.User', 'testapp.TestModel1')
+        )
+        with self.assertNumQueries(0):
+            registry.get_labels()
+
+        registry.remove_models(['auth.User'])
+        self.assertEqual(
+            registry.get_labels(), ('testapp.TestModel2', 'testapp.TestModel1')
+        )
+
+    def test_shared_version(self):
+        registry.add_models(['auth.User'])
+        self.assertEqual(registry.get_labels(), ('auth.User',))
+        # change made by another process only touches the database
+        # and the shared version stamp
+        PanelModel.objects.all().delete()
+        self.assertEqual(registry.get_labels(), ('auth.User',))
+        registry.invalidate()
+        self.assertEqual(registry.get_labels(), ())
+
+
+class SharedCacheCheckTestCase(TestCase):
+    def test_process_local_cache_warns(self):
+        self.assertEqual(
+            [message.id for message in check_shared_cache(None)],
+            ['myadmin.W001']
         )
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'myadmin_cache',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ModelCatalogTestCase(TestCase):
+    def test_lookup(self):
+        info = catalog.get('auth.User')
+        self.assertIs(info.model, User)
+        self.assertIs(catalog.get('auth.user'), info)
+        self.assertIs(catalog.get(User), info)
+        self.assertIn('testapp.TestModel1', catalog)
+        self.assertNotIn('testapp.Missing', catalog)
+        with self.assertRaises(LookupError):
+            catalog.get('testapp.Missing')
+
+    def test_metadata(self):
+        info = catalog.get('testapp.TestModel1')
+        self.assertEqual(info.app_label, 'testapp')
+        self.assertEqual(info.name, 'TestModel1')
+        self.assertEqual(info.verbose_name, 'test model1')
+        self.assertEqual(
+            (info.add_perm, info.change_perm, info.delete_perm),
+            ('testapp.add_testmodel1', 'testapp.change_testmodel1',
+             'testapp.delete_testmodel1')
+        )
+        self.assertEqual(info.url('edit', obj_pk=3), reverse(
+            'myadmin:edit', kwargs={
+                'model_name': 'testapp.TestModel1', 'obj_pk': 3
+            }
+        ))
+
+
+class CreateFormTestCase(TestCase):
+    def test_form_classes_are_cached(self):
+        form_class = create_form(TestModel1)
+        self.assertIs(create_form(TestModel1), form_class)
+        self.assertEqual(
+            list(form_class.base_fields), ['text', 'integer']
+        )
+        self.assertIsNot(create_form(TestModel2), form_class)
+
+        only_text = create_form(TestModel1, fields=['text'])
+        self.assertEqual(list(only_text.base_fields), ['text'])
+        self.assertIs(create_form(TestModel1, fields=('text',)), only_text)
+        self.assertEqual(
+            list(create_form(TestModel1, exclude=['text']).base_fields),
+            ['integer']
+        )
+
+    def test_catalog_rebuild_invalidates(self):
+        form_class = create_form(TestModel1)
+        catalog.build()
+        self.assertIsNot(create_form(TestModel1), form_class)
+
+    def test_prebuild_on_first_request(self):
+        cache.clear()
+        calls = []
+
+        def application(environ, start_response):
+            calls.append(environ)
+            return []
+        with self.assertNumQueries(0):
+            wrapped = prebuild_on_first_request(application)
+        with self.assertNumQueries(2):  # the panel and its labels
+            wrapped({}, None)
+        with self.assertNumQueries(0):
+            wrapped({}, None)
+        self.assertEqual(len(calls), 2)
 
 
 class CustomAdminPanelTestView(TestCase):
     def setUp(self):
+        cache.clear()
         self.access_perm = Permission.objects.get(codename='access_panel')
         self.user_add_perm = Permission.objects.get(codename='add_user')
         self.user_edit_perm = Permission.objects.get(codename='change_user')
@@ -88,9 +260,17 @@ class CustomAdminPanelTestView(TestCase):
 
     def test_selecting_model(self):
         self.client.force_login(self.access_user)
-        # adding models to panel
+        self.access_user.user_permissions.add(
+            Permission.objects.get(codename='add_group')
+        )
+        # adding models to panel, only models with permissions are listed
+        response = self.client.get(reverse('myadmin:panel'))
+        self.assertEqual(
+            response.context['models_select'],
+            [('auth', 'Group'), ('auth', 'User')]
+        )
         response = self.client.post(reverse('myadmin:panel'), data={
-            'add': ['Add'], 'select_models': ['1', '3']
+            'add': ['Add'], 'select_models': ['0', '1']
         })
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['models_view']), 2)
@@ -169,6 +349,44 @@ class CustomAdminPanelTestView(TestCase):
         ))
         self.assertFalse(User.objects.filter(username='qwe').exists())
 
+    def test_unknown_model(self):
+        # the permission is checked before the model is looked up
+        self.client.force_login(self.access_user)
+        url = reverse('myadmin:create', kwargs={'model_name': 'auth.Nope'})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.access_user.is_superuser = True
+        self.access_user.save()
+        self.assertRedirects(self.client.get(url), reverse('myadmin:panel'))
+
+
+class AdminPanelPaginationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='obj {}'.format(i), integer=i) for i in range(20)]
+        )
+        display_relations(TestModel1)  # one-off probe of __str__
+        registry.add_models(['testapp.TestModel1'])
+        self.factory = RequestFactory()
+        self.view = AdminPanelView()
+        self.view.get_existing_models = lambda: [TestModel1]
+
+    def test_only_page_is_fetched(self):
+        request = self.factory.get('/', {'testapp.TestModel1': '2'})
+        with self.assertNumQueries(2):  # COUNT + single LIMIT/OFFSET page
+            models = self.view.create_models_data(request)
+            objects = list(models[0][1])
+        self.assertEqual(
+            objects, list(TestModel1.objects.order_by('pk')[6:12])
+        )
+
+    def test_out_of_range_page(self):
+        request = self.factory.get('/', {'testapp.TestModel1': '100'})
+        page = self.view.create_models_data(request)[0][1]
+        self.assertEqual(page.number, 4)
+        self.assertEqual(len(page), 2)
+
 
 class ApiTestCase(TestCase):
     def setUp(self):
@@ -238,3 +456,1733 @@ class ApiTestCase(TestCase):
         ))
         self.assertEqual(response.status_code, 204)
         self.assertFalse(User.objects.filter(username='log2').exists())
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='obj {}'.format(i), integer=i) for i in range(40)]
+        )
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.client.force_login(self.user)
+
+    def test_api_pages_are_capped(self):
+        url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['previous'])
+
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='more', integer=i) for i in range(80)]
+        )
+        response = self.client.get(url, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 100)  # max_page_size
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(
+            len(self.client.get(response.data['next']).data['results']), 20
+        )
+
+        response = self.client.get(url)
+        second = self.client.get(response.data['next'])
+        expected = TestModel1.objects.order_by('pk')[5:10]
+        self.assertEqual(
+            [row['id'] for row in second.data['results']],
+            [obj.pk for obj in expected]
+        )
+        self.assertIsNotNone(second.data['previous'])
+
+    @override_settings(MYADMIN_LIST_PAGINATION='keyset')
+    def test_list_view_keyset(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(
+            list(response.context['object_list']),
+            list(TestModel1.objects.order_by('pk')[:15])
+        )
+        next_url = response.context['paginator'].get_next_link()
+        # session, user and the page itself - no COUNT, permissions are
+        # cached since the first request
+        with self.assertNumQueries(3):
+            response = self.client.get(next_url)
+        self.assertEqual(
+            list(response.context['object_list']),
+            list(TestModel1.objects.order_by('pk')[15:30])
+        )
+
+
+class CountPaginatorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='obj {}'.format(i), integer=i) for i in range(20)]
+        )
+        registry.add_models(['testapp.TestModel1'])
+        self.queryset = TestModel1.objects.order_by('pk')
+
+    def test_exact_count_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(CountPaginator(self.queryset, 6).count, 20)
+        with self.assertNumQueries(0):
+            self.assertEqual(CountPaginator(self.queryset, 6).count, 20)
+        # filtered querysets are always counted
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                CountPaginator(self.queryset.filter(integer__lt=5), 6).count, 5
+            )
+
+    def test_without_count(self):
+        paginator = CountPaginator(self.queryset, 6, strategy='none')
+        with self.assertNumQueries(1):
+            page = paginator.page(3)
+            self.assertTrue(page.has_next())
+        self.assertEqual(list(page), list(self.queryset[12:18]))
+        page = paginator.page(4)
+        self.assertFalse(page.has_next())
+        self.assertEqual((page.start_index(), page.end_index()), (19, 20))
+        self.assertFalse(paginator.counted)
+        self.assertEqual(paginator.get_page(10).number, 1)
+
+    @override_settings(MYADMIN_COUNT_STRATEGY='none')
+    def test_list_pages_without_count(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='more', integer=i) for i in range(20)]
+        )
+        user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(user)
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page': 2})
+        self.assertContains(response, 'page=3')
+        self.assertContains(response, 'page=1')
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+
+    def test_list_pages_are_ordered(self):
+        user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(user)
+        response = self.client.get(reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        }), {'page': 2})
+        self.assertTrue(response.context['paginator'].object_list.ordered)
+        self.assertEqual(
+            list(response.context['object_list']),
+            list(TestModel1.objects.order_by('pk')[15:30])
+        )
+
+    @override_settings(
+        MYADMIN_COUNT_STRATEGY='estimate',
+        MYADMIN_COUNT_ESTIMATE_THRESHOLD=10
+    )
+    def test_estimated_count(self):
+        paginator = CountPaginator(self.queryset, 6)
+        self.assertEqual(paginator.count, 20)  # no statistics yet
+        self.assertFalse(paginator.estimated)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = CountPaginator(self.queryset, 6)
+        self.assertEqual(paginator.count, 20)
+        self.assertTrue(paginator.estimated)
+        self.assertTrue(paginator.page(3).has_next())
+        self.assertFalse(paginator.page(4).has_next())
+
+
+class CountInvalidationTestCase(TransactionTestCase):
+    def test_signals_update_cached_count(self):
+        cache.clear()
+        registry.add_models(['testapp.TestModel1'])
+        queryset = TestModel1.objects.order_by('pk')
+        obj = TestModel1.objects.create(text='a')
+        self.assertEqual(CountPaginator(queryset, 6).count, 1)
+        TestModel1.objects.create(text='b')
+        with self.assertNumQueries(0):
+            self.assertEqual(CountPaginator(queryset, 6).count, 2)
+        obj.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(CountPaginator(queryset, 6).count, 1)
+
+
+class SignalTrackingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tracking.sync()
+
+    def test_receivers_follow_the_registry(self):
+        collector = Collector('default')
+        self.assertTrue(collector.can_fast_delete(BenchLock.objects.all()))
+        registry.add_models(['testapp.BenchLock'])
+        self.assertIn(BenchRelated, tracking.models_for(BenchLock))
+        self.assertFalse(collector.can_fast_delete(BenchLock.objects.all()))
+        registry.remove_models(['testapp.BenchLock'])
+        self.assertTrue(collector.can_fast_delete(BenchLock.objects.all()))
+
+    def test_untracked_models_are_not_cached(self):
+        queryset = TestModel2.objects.order_by('pk')
+        self.assertEqual(CountPaginator(queryset, 6).count, 0)
+        TestModel2.objects.create(text='a')
+        self.assertEqual(CountPaginator(queryset, 6).count, 1)
+
+        user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(user)
+        response = self.client.get(reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel2'
+        }))
+        self.assertFalse(response.has_header('ETag'))
+
+
+class CreateSerializerTestCase(TestCase):
+    def test_serializer_classes_are_cached(self):
+        serializer_class = create_serializer(TestModel1)
+        self.assertIs(create_serializer(TestModel1), serializer_class)
+        self.assertIs(serializer_class.Meta.model, TestModel1)
+        self.assertIs(create_serializer(TestModel2).Meta.model, TestModel2)
+        # the shared base class is left untouched
+        self.assertIsNone(GeneralSerializer.Meta.model)
+
+    def test_serialization(self):
+        obj = TestModel1.objects.create(text='abc', integer=3)
+        self.assertEqual(
+            create_serializer(TestModel1)(obj).data,
+            {'id': obj.pk, 'text': 'abc', 'integer': 3}
+        )
+
+
+class SparseFieldsApiTestCase(TestCase):
+    def setUp(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='obj {}'.format(i), integer=i) for i in range(3)]
+        )
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+
+    def test_fields(self):
+        response = self.client.get(self.url, {'fields': 'text'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [dict(row) for row in response.data['results']],
+            [{'id': obj.pk, 'text': obj.text}
+             for obj in TestModel1.objects.order_by('pk')]
+        )
+        response = self.client.get(self.url, {'exclude': 'text'})
+        self.assertEqual(
+            list(response.data['results'][0]), ['id', 'integer']
+        )
+        obj = TestModel1.objects.first()
+        response = self.client.get(reverse('myadmin:model-detail', kwargs={
+            'model_name': 'testapp.TestModel1', 'pk': obj.pk
+        }), {'fields': 'integer'})
+        self.assertEqual(response.data, {'id': obj.pk, 'integer': 0})
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {'fields': 'text,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_values_fast_path(self):
+        url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'auth.User'
+        })
+        fields = ['id', 'username', 'last_login', 'date_joined']
+        # session, user, permissions and one projected page query
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'fields': ','.join(fields)})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(
+            dict(response.data['results'][0]),
+            dict(create_serializer(User, fields)(
+                User.objects.get(pk=self.user.pk)
+            ).data)
+        )
+        self.assertTrue(response.data['results'][0]['date_joined'])
+
+
+class QueryPlannerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+
+    def test_display_relations(self):
+        # Permission.__str__ renders its content type
+        self.assertEqual(display_relations(Permission), ('content_type',))
+        self.assertEqual(display_relations(TestModel1), ())
+        queryset = plan_for_display(Permission.objects.all())
+        with self.assertNumQueries(1):
+            [str(obj) for obj in queryset[:20]]
+
+    def test_probe_sets_nullable_relations(self):
+        planner._display_relations.pop(TestComment, None)
+        TestComment.objects.create(text='first')
+        TestComment.objects.create(text='second', author=self.user)
+        # the first row gets the author of another one
+        self.assertEqual(display_relations(TestComment), ('author',))
+        with self.assertNumQueries(0):
+            self.assertEqual(display_relations(TestComment), ('author',))
+
+    def test_partial_probe_is_kept_for_a_while(self):
+        planner._display_relations.pop(TestComment, None)
+        TestComment.objects.create(text='anonymous')
+        self.assertEqual(display_relations(TestComment), ())
+        with self.assertNumQueries(0):
+            self.assertEqual(display_relations(TestComment), ())
+
+        planner._display_relations.pop(TestComment)
+        with override_settings(MYADMIN_PLANNER_PROBE_TIMEOUT=0):
+            self.assertEqual(display_relations(TestComment), ())
+        TestComment.objects.create(text='signed', author=self.user)
+        self.assertEqual(display_relations(TestComment), ('author',))
+
+    @override_settings(MYADMIN_PLANNER_PROBE_TIMEOUT=0)
+    def test_failed_probe_is_retried(self):
+        # TestModel1.__str__ fails without a text
+        obj = TestModel1.objects.create()
+        planner._display_relations.pop(TestModel1, None)
+        self.assertEqual(display_relations(TestModel1), ())
+        self.assertIsNotNone(planner._display_relations[TestModel1][1])
+
+        obj.text = 'text'
+        obj.save()
+        self.assertEqual(display_relations(TestModel1), ())
+        self.assertIsNone(planner._display_relations[TestModel1][1])
+
+    def test_serializer_plan(self):
+        queryset = plan_for_serializer(
+            User.objects.all(), create_serializer(User)
+        )
+        with self.assertNumQueries(3):  # users, groups, permissions
+            create_serializer(User)(queryset, many=True).data
+
+    def test_detector(self):
+        with self.assertRaises(NPlusOneError):
+            with detect_n_plus_one(threshold=3, raise_exception=True):
+                for obj in Permission.objects.all()[:5]:
+                    str(obj)
+        with detect_n_plus_one(threshold=3, raise_exception=True):
+            for obj in plan_for_display(Permission.objects.all())[:5]:
+                str(obj)
+
+    @override_settings(MYADMIN_NPLUSONE_RAISE=True)
+    def test_middleware(self):
+        self.client.force_login(self.user)
+        with self.modify_settings(MIDDLEWARE={
+            'append': 'myadmin.planner.NPlusOneMiddleware'
+        }):
+            response = self.client.get(reverse(
+                'myadmin:objects', kwargs={'model_name': 'auth.Permission'}
+            ))
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(reverse(
+                'myadmin:model-list', kwargs={'model_name': 'auth.User'}
+            ))
+            self.assertEqual(response.status_code, 200)
+
+
+@override_settings(MYADMIN_BULK_BATCH_SIZE=2)
+class BulkApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel'),
+            *Permission.objects.filter(content_type__model='testmodel1')
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+
+    def request(self, method, data):
+        return getattr(self.client, method)(
+            self.url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_bulk_create(self):
+        response = self.request('post', [
+            {'text': 'obj {}'.format(i), 'integer': i} for i in range(5)
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 5})
+        self.assertEqual(
+            list(TestModel1.objects.values_list('integer', flat=True)),
+            list(range(5))
+        )
+
+        response = self.request('post', [
+            {'text': 'ok', 'integer': 1}, {'text': 'bad', 'integer': 'x'}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('integer', response.data['errors'][1])
+        self.assertEqual(TestModel1.objects.count(), 5)
+
+    def test_bulk_update(self):
+        objs = [TestModel1.objects.create(text='a', integer=i)
+                for i in range(5)]
+        # auth (3), in_bulk and UPDATE per batch of 2, savepoint (2)
+        with self.assertNumQueries(3 + 3 + 3 + 2):
+            response = self.request('patch', [
+                {'id': obj.pk, 'integer': obj.integer * 10} for obj in objs
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(TestModel1.objects.values_list('integer', 'text')),
+            [(i * 10, 'a') for i in range(5)]
+        )
+
+        response = self.request('patch', [
+            {'id': objs[0].pk, 'text': 'b'}, {'id': 0, 'text': 'c'}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][1], {'id': ['Not found.']})
+        self.assertFalse(TestModel1.objects.filter(text='b').exists())
+
+    def test_bulk_destroy(self):
+        objs = [TestModel1.objects.create(text='a') for i in range(5)]
+        response = self.request('delete', {'ids': [0, objs[0].pk]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [['Not found.'], {}])
+
+        response = self.request('delete', {
+            'ids': [obj.pk for obj in objs[:4]]
+        })
+        self.assertEqual(response.data, {'deleted': 4})
+        self.assertEqual(list(TestModel1.objects.all()), objs[4:])
+
+    def test_duplicates_within_the_request(self):
+        self.client.force_login(
+            User.objects.create_superuser('admin', 'b@b.b', 'qw12')
+        )
+        self.url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'auth.Group'
+        })
+        response = self.request('post', [
+            {'name': 'a'}, {'name': 'b'}, {'name': 'a'}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][:2], [{}, {}])
+        self.assertIn('name', response.data['errors'][2])
+        self.assertFalse(Group.objects.exists())
+
+        groups = [Group.objects.create(name=name) for name in 'ab']
+        response = self.request('patch', [
+            {'id': group.pk, 'name': 'c'} for group in groups
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data['errors'][1])
+
+    def test_protected_rows_are_reported(self):
+        # TestModel1 -> BenchRelated (CASCADE) -> BenchLock (PROTECT)
+        free, parent = [TestModel1.objects.create(text='a') for _ in 'ab']
+        related = BenchRelated.objects.create(
+            name='related', parent=parent,
+            category=BenchCategory.objects.create(name='category'),
+            wide=BenchWide.objects.create(char_1='wide')
+        )
+        BenchLock.objects.create(related=related)
+        response = self.request('delete', {'ids': [free.pk, parent.pk]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['errors'], [
+            {}, ['Protected by testapp.BenchLock.related.']
+        ])
+        self.assertEqual(TestModel1.objects.count(), 2)
+
+    def test_permissions(self):
+        self.user.user_permissions.remove(
+            Permission.objects.get(codename='change_testmodel1')
+        )
+        response = self.request('patch', [])
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_update_helper(self):
+        objs = [TestModel1.objects.create(text='a', integer=i)
+                for i in range(3)]
+        for obj in objs:
+            obj.text = 'text {}'.format(obj.integer)
+        self.assertEqual(bulk.bulk_update(TestModel1, objs, ['text']), 3)
+        self.assertEqual(
+            list(TestModel1.objects.values_list('text', flat=True)),
+            ['text 0', 'text 1', 'text 2']
+        )
+
+
+class BulkDeleteTestCase(TestCase):
+    def setUp(self):
+        self.content_type = ContentType.objects.create(
+            app_label='bulk', model='deleted'
+        )
+        self.permissions = [
+            Permission.objects.create(
+                codename='perm{}'.format(i), name='Perm {}'.format(i),
+                content_type=self.content_type
+            ) for i in range(3)
+        ]
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel'),
+            Permission.objects.get(codename='delete_testmodel1'),
+            *self.permissions
+        )
+
+    def test_cascade_preview(self):
+        queryset = ContentType.objects.filter(pk=self.content_type.pk)
+        self.assertEqual(bulk.cascade_preview(queryset), [
+            ('contenttypes.ContentType', '', 'DELETE', 1),
+            ('auth.Permission', 'content_type', 'CASCADE', 3),
+            ('auth.User_user_permissions', 'permission', 'CASCADE', 3),
+        ])
+        queryset = Permission.objects.filter(
+            pk__in=[perm.pk for perm in self.permissions]
+        )
+        self.assertIn(
+            ('auth.User_user_permissions', 'permission', 'CASCADE', 3),
+            bulk.cascade_preview(queryset)
+        )
+
+    def test_chunked_delete(self):
+        deleted = bulk.chunked_delete(
+            ContentType.objects.filter(pk=self.content_type.pk), chunk_size=2
+        )
+        self.assertEqual(deleted['auth.Permission'], 3)
+        self.assertEqual(deleted['contenttypes.ContentType'], 1)
+        self.assertEqual(deleted['auth.User_user_permissions'], 3)
+        self.assertFalse(Permission.objects.filter(
+            content_type_id=self.content_type.pk
+        ).exists())
+
+    def test_protected_rows_stop_the_delete(self):
+        # TestModel1 -> BenchRelated (CASCADE) -> BenchLock (PROTECT)
+        parent = TestModel1.objects.create(text='parent')
+        category = BenchCategory.objects.create(name='category')
+        related = BenchRelated.objects.create(
+            name='related', category=category, parent=parent,
+            wide=BenchWide.objects.create(char_1='wide')
+        )
+        related.tags.add(category)
+        BenchLock.objects.create(related=related)
+        queryset = TestModel1.objects.filter(pk=parent.pk)
+        self.assertIn(
+            ('testapp.BenchLock', 'related', 'PROTECT', 1),
+            bulk.cascade_preview(queryset)
+        )
+        with self.assertRaises(ProtectedError):
+            bulk.chunked_delete(queryset, chunk_size=1)
+        # nothing was deleted, not even the cascading rows
+        self.assertTrue(queryset.exists())
+        self.assertEqual(list(related.tags.all()), [category])
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('myadmin:delete', kwargs={
+            'model_name': 'testapp.TestModel1', 'obj_pk': parent.pk
+        }))
+        self.assertEqual(response.status_code, 409)
+        self.assertNotContains(response, 'name="confirm"', status_code=409)
+        response = self.client.post(reverse('myadmin:bulk_delete', kwargs={
+            'model_name': 'testapp.TestModel1'
+        }), {'ids': [parent.pk], 'confirm': 'Delete'})
+        self.assertTrue(response.context['protected'])
+        self.assertTrue(response.context['error'])
+        self.assertNotContains(response, 'name="confirm"')
+        self.assertTrue(BenchRelated.objects.filter(pk=related.pk).exists())
+
+    def test_view(self):
+        objs = [TestModel1.objects.create(text=str(i)) for i in range(5)]
+        url = reverse('myadmin:bulk_delete', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.client.force_login(self.user)
+        ids = [objs[0].pk, objs[2].pk]
+        response = self.client.post(url, {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['preview'],
+            [('testapp.TestModel1', '', 'DELETE', 2)]
+        )
+        self.assertEqual(TestModel1.objects.count(), 5)
+
+        response = self.client.post(url, {'ids': ids, 'confirm': 'Delete'})
+        self.assertRedirects(response, reverse(
+            'myadmin:objects', kwargs={'model_name': 'testapp.TestModel1'}
+        ))
+        self.assertEqual(
+            list(TestModel1.objects.all()), [objs[1]] + objs[3:]
+        )
+
+        response = self.client.post(url, {
+            'pk_min': objs[3].pk, 'pk_max': '', 'confirm': 'Delete'
+        })
+        self.assertEqual(list(TestModel1.objects.all()), [objs[1]])
+
+        # a bound of 0 is kept in the confirmation form
+        response = self.client.post(url, {
+            'pk_min': -10, 'pk_max': 0, 'range': ''
+        })
+        self.assertContains(response, 'name="pk_min" value="-10"')
+        self.assertContains(response, 'name="pk_max" value="0"')
+
+        self.user.user_permissions.remove(
+            Permission.objects.get(codename='delete_testmodel1')
+        )
+        response = self.client.post(url, {'ids': [objs[1].pk]})
+        self.assertEqual(response.status_code, 403)
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.objs = [
+            TestModel1.objects.create(text='obj, {}'.format(i), integer=i)
+            for i in range(5)
+        ]
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel'),
+            Permission.objects.get(codename='change_testmodel1')
+        )
+        self.client.force_login(self.user)
+
+    def url(self, export_format, model_name='testapp.TestModel1'):
+        return reverse('myadmin:export', kwargs={
+            'model_name': model_name, 'export_format': export_format
+        })
+
+    def test_iter_rows(self):
+        fields = export.get_export_fields(TestModel1, ['integer'])
+        with self.assertNumQueries(3):  # chunks of 2, 2 and 1 rows
+            rows = list(export.iter_rows(
+                TestModel1.objects.all(), fields, chunk_size=2
+            ))
+        self.assertEqual(rows[:3], [(0,), (1,), (2,)])
+        self.assertEqual(len(rows), 5)
+
+    def test_csv(self):
+        response = self.client.get(self.url('csv'), {
+            'fields': 'id,text', 'pk_min': self.objs[3].pk
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            'id,text\r\n{},"obj, 3"\r\n{},"obj, 4"\r\n'.format(
+                self.objs[3].pk, self.objs[4].pk
+            )
+        )
+
+    def test_jsonl(self):
+        response = self.client.get(self.url('jsonl'), {
+            'pk_max': self.objs[1].pk
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'id': obj.pk, 'text': obj.text, 'integer': obj.integer}
+            for obj in self.objs[:2]
+        ])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url('csv'), {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_permissions(self):
+        url = self.url('csv', 'auth.User')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(self.url('csv', 'auth.Nope')).status_code, 403
+        )
+
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get(url)
+        header = b''.join(response.streaming_content).decode().split()[0]
+        self.assertIn('username', header.split(','))
+        self.assertNotIn('password', header.split(','))
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTestCase(TestCase):
+    def test_jsonl(self):
+        data = b'\n'.join([
+            b'{"text": "a", "integer": 1}',
+            b'{"text": "b", "integer": "x"}',
+            b'',
+            b'not json',
+            b'{"text": "c", "integer": 3}',
+        ])
+        result = Importer(TestModel1, batch_size=2).run(
+            iter_records(io.BytesIO(data), 'jsonl')
+        )
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.processed, 4)
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertIn('integer', result.errors[0][1])
+        self.assertEqual(
+            list(TestModel1.objects.values_list('text', flat=True)),
+            ['a', 'c']
+        )
+
+    def test_csv_resume(self):
+        data = b'text,integer\r\na,1\r\nb,2\r\nc,3\r\n'
+        processed = []
+        result = Importer(TestModel1, batch_size=1).run(
+            iter_records(io.BytesIO(data), 'csv'), skip=1,
+            progress=lambda result: processed.append(result.processed)
+        )
+        self.assertEqual(processed, [2, 3])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            list(TestModel1.objects.values_list('text', 'integer')),
+            [('b', 2), ('c', 3)]
+        )
+
+    def test_unique_fields(self):
+        User.objects.create_user('taken', 'a@a.a', 'qw12')
+        data = b'\n'.join(
+            '{{"username": "{}", "password": "x", '
+            '"date_joined": "2017-08-20 18:00:00"}}'.format(name).encode()
+            for name in ['new', 'taken', 'new', 'other']
+        )
+        # unique check and the INSERT in a savepoint
+        with self.assertNumQueries(4):
+            result = Importer(User).run(
+                iter_records(io.BytesIO(data), 'jsonl')
+            )
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [
+            (2, {'username': ['Value already exists.']}),
+            (3, {'username': ['Duplicate value in the file.']}),
+        ])
+
+    def test_view_and_command(self):
+        user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        user.user_permissions.add(
+            Permission.objects.get(codename='access_panel'),
+            Permission.objects.get(codename='add_testmodel1'),
+        )
+        self.client.force_login(user)
+        url = reverse('myadmin:import', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {
+            'file': SimpleUploadedFile(
+                'rows.csv', b'text,integer\r\na,1\r\nb,2\r\n'
+            ),
+            'file_format': 'csv',
+            'skip': 0,
+        })
+        self.assertEqual(response.context['result'].created, 2)
+
+        with tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False) as f:
+            f.write(b'{"text": "c", "integer": 3}\n')
+        try:
+            call_command(
+                'import_rows', 'testapp.TestModel1', f.name,
+                stdout=io.StringIO()
+            )
+        finally:
+            os.remove(f.name)
+        self.assertEqual(
+            list(TestModel1.objects.values_list('text', flat=True)),
+            ['a', 'b', 'c']
+        )
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.client.force_login(self.user)
+        self.obj = TestModel1.objects.create(text='a', integer=1)
+        registry.add_models(['testapp.TestModel1'])
+        self.age_version(TestModel1)
+
+    def age_version(self, model):
+        # Last-Modified is only sent once the second of the change is over
+        token, timestamp = versions.get_version(model)
+        cache.set(versions.version_key(model), (token, timestamp - 2), None)
+
+    def assertNotModified(self, url, response):
+        etag = response['ETag']
+        with self.assertNumQueries(2):  # session and user, perms cached
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_list_view(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(url, response)
+
+        self.obj.text = 'b'
+        self.obj.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+        page = self.client.get(url, {'page': 1})
+        self.assertNotEqual(page['ETag'], changed['ETag'])
+
+    def test_api(self):
+        list_url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        detail_url = reverse('myadmin:model-detail', kwargs={
+            'model_name': 'testapp.TestModel1', 'pk': self.obj.pk
+        })
+        for url in (list_url, detail_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotModified(url, response)
+
+        response = self.client.get(list_url)
+        bulk.bulk_create(TestModel1, [TestModel1(text='b', integer=2)])
+        changed = self.client.get(
+            list_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(changed.status_code, 200)
+
+    def test_panel(self):
+        registry.add_models(['testapp.TestModel1'])
+        url = reverse('myadmin:panel')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(url, response)
+
+        registry.remove_models(['testapp.TestModel1'])
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_etag_varies(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        response = self.client.get(url)
+        self.assertNotEqual(
+            self.client.get(url, HTTP_ACCEPT='text/plain')['ETag'],
+            response['ETag']
+        )
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='change_testmodel1')
+        )
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_no_last_modified_within_the_second(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.assertIn('Last-Modified', self.client.get(url))
+        self.obj.save()
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('ETag', response)
+
+
+class PanelFragmentCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        TestModel1.objects.create(text='a', integer=1)
+        registry.add_models(['testapp.TestModel1'])
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        get_permissions(self.user)  # loaded once per request anyway
+        self.view = AdminPanelView()
+
+    def render(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        return self.view.render_models_data(request)
+
+    def test_warm_render_does_no_queries(self):
+        cold = self.render()
+        with self.assertNumQueries(0):
+            warm = self.render()
+        self.assertEqual(warm, cold)
+        self.assertIn('a', cold[0][1])
+
+    def test_invalidated_by_changes(self):
+        self.render()
+        TestModel1.objects.create(text='new object', integer=2)
+        self.assertIn('new object', self.render()[0][1])
+
+        bulk.bulk_create(TestModel1, [TestModel1(text='bulk', integer=3)])
+        self.assertIn('bulk', self.render()[0][1])
+
+        TestModel1.objects.filter(text='bulk').delete()
+        self.assertNotIn('bulk', self.render()[0][1])
+
+    def test_per_page_and_permissions(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='obj {}'.format(i), integer=i) for i in range(9)]
+        )
+        self.render()
+        with self.assertNumQueries(0):
+            self.render()
+        page = self.render(**{'testapp.TestModel1': '2'})
+        self.assertIn('obj 8', page[0][1])
+
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='change_testmodel1')
+        )
+        self.user = User.objects.get(pk=self.user.pk)
+        get_permissions(self.user)
+        with self.assertNumQueries(1):  # COUNT is cached, page only
+            self.render()
+
+
+@override_settings(MYADMIN_PANEL_WORKERS=2)
+class ParallelPanelTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        TestModel1.objects.create(text='first model', integer=1)
+        TestModel2.objects.create(text='second model', integer=2)
+        registry.add_models(['testapp.TestModel2', 'testapp.TestModel1'])
+        self.user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.view = AdminPanelView()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_pages_are_loaded_in_registration_order(self):
+        models = self.view.render_models_data(self.request)
+        self.assertEqual(
+            [label for label, _ in models],
+            ['testapp.TestModel2', 'testapp.TestModel1']
+        )
+        self.assertIn('second model', models[0][1])
+        self.assertIn('first model', models[1][1])
+
+    @override_settings(MYADMIN_PANEL_TIMEOUT=0.1)
+    def test_slow_model_renders_placeholder(self):
+        release = threading.Event()
+        load_model_page = self.view.load_model_page
+
+        def slow_load(request, model):
+            if model is TestModel2:
+                release.wait(5)
+            return load_model_page(request, model)
+
+        self.view.load_model_page = slow_load
+        try:
+            models = self.view.render_models_data(self.request)
+        finally:
+            release.set()
+        self.assertIn('Still loading', models[0][1])
+        self.assertIn('first model', models[1][1])
+
+        # the placeholder is not cached
+        self.view.load_model_page = load_model_page
+        models = self.view.render_models_data(self.request)
+        self.assertIn('second model', models[0][1])
+
+
+    def test_page_with_placeholders_is_not_cached(self):
+        load_model_pages = AdminPanelView.load_model_pages
+        AdminPanelView.load_model_pages = (
+            lambda view, request, models: [None] * len(models)
+        )
+        self.client.force_login(self.user)
+        try:
+            response = self.client.get(reverse('myadmin:panel'))
+        finally:
+            AdminPanelView.load_model_pages = load_model_pages
+        self.assertContains(response, 'Still loading')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('no-store', response['Cache-Control'])
+
+        response = self.client.get(reverse('myadmin:panel'))
+        self.assertNotContains(response, 'Still loading')
+        self.assertTrue(response.has_header('ETag'))
+
+
+class FilterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.other = User.objects.create_user(
+            'other', 'b@b.b', 'qw12', first_name='Max'
+        )
+        self.client.force_login(self.user)
+
+    def test_indexed_fields_only(self):
+        self.assertEqual(indexed_fields(User), {'id', 'username'})
+        filters = create_filterset(User).base_filters
+        self.assertEqual(sorted(filters), [
+            'id', 'id__in', 'id__range',
+            'username', 'username__in', 'username__startswith'
+        ])
+
+    def test_relations_are_filtered_by_key(self):
+        filterset = create_filterset(BenchRelated)(
+            {'owner': str(self.other.pk)}, queryset=BenchRelated.objects.all()
+        )
+        self.assertNotIn('<option', filterset.form.as_p())
+        self.assertIn('owner_id', str(filterset.qs.query))
+        self.assertNotIn('auth_user', str(filterset.qs.query))
+
+    def test_unindexed_opt_in(self):
+        with override_settings(MYADMIN_FILTER_UNINDEXED=['auth.user']):
+            self.assertIn('first_name', create_filterset(User).base_filters)
+        # small table of known size
+        cache.set(count_cache_key(User, 'default'), 2)
+        self.assertIn('first_name', create_filterset(User).base_filters)
+        with override_settings(MYADMIN_FILTER_SCAN_THRESHOLD=2):
+            self.assertNotIn(
+                'first_name', create_filterset(User).base_filters
+            )
+
+    def test_api(self):
+        url = reverse('myadmin:model-list', kwargs={'model_name': 'auth.User'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'username__startswith': 'oth'})
+        self.assertEqual(
+            [row['username'] for row in response.data['results']], ['other']
+        )
+        # a range the index can serve, not LIKE
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'LIKE' in query['sql']
+        ])
+        response = self.client.get(url, {
+            'id__in': '{},{}'.format(self.user.pk, self.other.pk),
+            'fields': 'username'
+        })
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(url, {'id__range': 'a,b'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_view(self):
+        url = reverse('myadmin:objects', kwargs={'model_name': 'auth.User'})
+        response = self.client.get(url, {'username': 'other'})
+        self.assertEqual(list(response.context['object_list']), [self.other])
+        self.assertEqual(response.context['filter_query'], 'username=other')
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.add_models(['testapp.TestModel1'])
+        self.obj = TestModel1.objects.create(text='hello world', integer=1)
+
+    def found(self, query, **kwargs):
+        return [result.pk for result in search.search(query, **kwargs)]
+
+    def test_incremental_updates(self):
+        other = TestModel2.objects.create(text='hello', integer=2)
+        self.assertEqual(self.found('hello'), [str(self.obj.pk)])
+        self.assertEqual(self.found('WOR'), [str(self.obj.pk)])
+        self.assertEqual(
+            self.found('hello', labels=['testapp.TestModel2']), []
+        )
+        self.assertNotEqual(other.pk, None)
+
+        self.obj.text = 'goodbye world'
+        self.obj.save()
+        self.assertEqual(self.found('hello'), [])
+        self.assertEqual(self.found('goodbye world'), [str(self.obj.pk)])
+
+        self.obj.text = 'updated in bulk'
+        bulk.bulk_update(TestModel1, [self.obj], ['text'])
+        self.assertEqual(self.found('bulk'), [str(self.obj.pk)])
+
+        self.obj.delete()
+        self.assertEqual(self.found('bulk'), [])
+
+    def test_rebuild_command(self):
+        TestModel1.objects.bulk_create([
+            TestModel1(text='row {}'.format(i), integer=i) for i in range(5)
+        ])
+        self.assertEqual(self.found('row'), [])  # no pks from SQLite
+        call_command(
+            'rebuild_search_index', batch_size=2, stdout=io.StringIO()
+        )
+        self.assertEqual(len(self.found('row')), 5)
+        self.assertEqual(self.found('hello'), [str(self.obj.pk)])
+
+    def test_existing_rows_indexed_when_pending(self):
+        other = TestModel2.objects.create(text='hello', integer=2)
+        labels = ['testapp.TestModel2']
+        self.assertNotIn(labels[0], search.pending_labels())
+        with CaptureQueriesContext(connection) as queries:
+            registry.add_models(labels)
+        self.assertFalse([  # not read while adding the model
+            query for query in queries.captured_queries
+            if 'testapp_testmodel2' in query['sql']
+        ])
+        self.assertIn(labels[0], search.pending_labels())
+        self.assertEqual(self.found('hello', labels=labels), [])
+
+        call_command(
+            'rebuild_search_index', pending=True, stdout=io.StringIO()
+        )
+        self.assertEqual(self.found('hello', labels=labels), [str(other.pk)])
+        self.assertEqual(search.pending_labels(), [])
+
+    def test_backends_implement_search(self):
+        with self.assertRaises(TypeError):
+            search.BaseSearchBackend()
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.found('"hello" ('), [str(self.obj.pk)])
+        self.assertEqual(self.found('***'), [])
+
+    @override_settings(
+        MYADMIN_SEARCH_BACKEND='myadmin.search.ScanSearchBackend'
+    )
+    def test_scan_backend(self):
+        self.assertEqual(self.found('HELLO wor'), [str(self.obj.pk)])
+        self.assertEqual(self.found('hello nothing'), [])
+
+    def test_view(self):
+        user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse('myadmin:search'), {'q': 'hello'})
+        self.assertEqual(
+            [result[1] for result in response.context['results']], [self.obj]
+        )
+
+
+class TestModel1Backend(object):
+    """
+    Grants all permissions of TestModel1.
+    """
+    def authenticate(self, request, **credentials):
+        return None
+
+    def has_perm(self, user, perm, obj=None):
+        return perm.endswith('_testmodel1')
+
+
+class PermissionResolverTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.group = Group.objects.create(name='editors')
+        self.user.groups.add(self.group)
+        self.group.permissions.add(
+            Permission.objects.get(codename='change_testmodel1')
+        )
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='add_testmodel1')
+        )
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_single_query_then_cached(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertTrue(can(user, 'add', TestModel1))
+            self.assertTrue(can(user, 'change', 'testapp.TestModel1'))
+            self.assertFalse(can(user, 'delete', TestModel1))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(can(user, 'change', TestModel1))
+
+    def test_invalidation(self):
+        get_permissions(self.fresh_user())
+        self.group.permissions.add(
+            Permission.objects.get(codename='delete_testmodel1')
+        )
+        self.assertTrue(can(self.fresh_user(), 'delete', TestModel1))
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(can(self.fresh_user(), 'change', TestModel1))
+
+        self.user.user_permissions.clear()
+        self.assertFalse(can(self.fresh_user(), 'add', TestModel1))
+
+    @override_settings(AUTHENTICATION_BACKENDS=[
+        'django.contrib.auth.backends.ModelBackend',
+        'myadmin.tests.TestModel1Backend',
+    ])
+    def test_other_backends(self):
+        self.assertTrue(can(self.fresh_user(), 'delete', TestModel1))
+        self.assertFalse(can(self.fresh_user(), 'delete', TestModel2))
+
+    def test_superuser_and_inactive(self):
+        self.user.is_superuser = True
+        self.assertTrue(can(self.user, 'delete', TestModel1))
+        self.user.is_superuser = False
+        self.user.is_active = False
+        self.assertFalse(can(self.user, 'add', TestModel1))
+
+
+@override_settings(
+    MIDDLEWARE=settings.MIDDLEWARE + ['myadmin.timing.TimingMiddleware']
+)
+class TimingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('log1', 'a@a.a', 'qw12')
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='access_panel')
+        )
+        self.client.force_login(self.user)
+        TestModel1.objects.create(text='a', integer=1)
+
+    def test_server_timing_and_aggregates(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        for _ in range(3):
+            response = self.client.get(url)
+        header = response['Server-Timing']
+        for name in ('total', 'sql', 'template', 'serializer'):
+            self.assertIn(name + ';dur=', header)
+        self.assertIn('queries', header)
+
+        api_url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.client.get(api_url)
+        aggregates = timing.get_aggregates()
+        self.assertEqual(aggregates['myadmin:objects']['count'], 3)
+        self.assertGreater(aggregates['myadmin:objects']['queries']['p50'], 0)
+        self.assertGreater(
+            aggregates['myadmin:objects']['template']['p99'], 0
+        )
+        self.assertGreater(
+            aggregates['myadmin:model-list']['serializer']['p50'], 0
+        )
+
+        response = self.client.get(reverse('myadmin:timing'))
+        self.assertContains(response, 'myadmin:objects')
+
+    def test_other_urls_are_not_instrumented(self):
+        response = self.client.get('/admin/login/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_percentile(self):
+        counts = [0] * len(timing.BUCKETS)
+        self.assertIsNone(timing.percentile(counts, 0.5))
+        counts[2], counts[5] = 90, 10  # <= 2 ms and <= 20 ms
+        self.assertEqual(timing.percentile(counts, 0.5), 2)
+        self.assertEqual(timing.percentile(counts, 0.9), 2)
+        self.assertEqual(timing.percentile(counts, 0.95), 20)
+
+    def test_query_count(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.client.get(url)  # the registry is read once per version
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertIn(
+            'desc="{} queries"'.format(len(context)),
+            response['Server-Timing']
+        )
+        self.assertNotIn('cursor', connection.__dict__)
+
+
+class BenchmarkTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()  # registry version of the rolled back panel models
+
+    def test_run_and_compare(self):
+        results = benchmark.run_benchmarks([20], repeat=1)
+        measurements = results['20']
+        for name in ('panel_cold', 'list:testapp.BenchRelated',
+                     'api_bulk_destroy'):
+            self.assertIn(name, measurements)
+        for name, measurement in measurements.items():
+            self.assertLess(measurement['status'], 400, name)
+        self.assertGreater(measurements['panel_cold']['queries'], 0)
+        self.assertEqual(BenchRelated.objects.count(), 20)
+
+        self.assertEqual(benchmark.compare(results, results), [])
+        baseline = json.loads(json.dumps(results))
+        baseline['20']['api_retrieve']['queries'] -= 1
+        baseline['20']['panel_warm']['latency_ms'] /= 2
+        regressions = benchmark.compare(
+            results, baseline, latency_tolerance=0.5
+        )
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('api_retrieve: queries', regressions[1])
+
+
+@skipUnless(
+    'replica' in settings.DATABASES, 'no replica, set SKYGATE_REPLICA=1'
+)
+@override_settings(
+    MIDDLEWARE=settings.MIDDLEWARE + ['myadmin.routers.ReplicaMiddleware'],
+    DATABASE_ROUTERS=['myadmin.routers.ReplicaRouter'],
+    MYADMIN_REPLICAS=['replica']
+)
+class ReplicaRoutingTestCase(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(self.user)
+        TestModel1.objects.create(text='on primary', integer=1)
+        TestModel1.objects.using('replica').create(
+            text='on replica', integer=2
+        )
+        self.list_url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        self.api_url = reverse('myadmin:model-list', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+
+    def test_reads_go_to_replica(self):
+        response = self.client.get(self.list_url)
+        self.assertContains(response, 'on replica')
+        self.assertNotContains(response, 'on primary')
+
+        response = self.client.get(self.api_url)
+        self.assertEqual(
+            [obj['text'] for obj in response.data['results']],
+            ['on replica']
+        )
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.client.post(
+            reverse('myadmin:create', kwargs={
+                'model_name': 'testapp.TestModel1'
+            }),
+            {'text': 'created', 'integer': 3}
+        )
+        self.assertIn('myadmin_primary', response.cookies)
+        response = self.client.get(self.list_url)
+        self.assertContains(response, 'created')
+        self.assertContains(response, 'on primary')
+
+        self.client.cookies.pop('myadmin_primary')
+        self.assertNotContains(self.client.get(self.list_url), 'created')
+
+    def test_api_write_pins_and_failed_write_does_not(self):
+        response = self.client.post(self.api_url, {'integer': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('myadmin_primary', response.cookies)
+
+        response = self.client.post(
+            self.api_url, {'text': 'api', 'integer': 4}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('myadmin_primary', response.cookies)
+        response = self.client.get(self.api_url)
+        self.assertIn(
+            'api', [obj['text'] for obj in response.data['results']]
+        )
+
+    def test_no_validators_for_replica_reads(self):
+        registry.add_models(['testapp.TestModel1'])
+        response = self.client.get(self.list_url)
+        self.assertFalse(response.has_header('ETag'))
+        self.client.cookies['myadmin_primary'] = '1'
+        self.assertTrue(self.client.get(self.list_url).has_header('ETag'))
+
+    def test_replica_pages_are_not_cached(self):
+        TestModel1.objects.create(text='on primary too', integer=3)
+        registry.add_models(['testapp.TestModel1'])
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with use_replica('replica'):
+            page = AdminPanelView().render_models_data(request)[0][1]
+            self.assertIn('on replica', page)
+        page = AdminPanelView().render_models_data(request)[0][1]
+        self.assertIn('on primary', page)
+
+        # the count of the replica (1) was not cached, the replica uses
+        # the count of the default database instead
+        self.assertEqual(
+            CountPaginator(TestModel1.objects.all(), 10).count, 2
+        )
+        self.assertEqual(
+            count_cache_key(TestModel1, 'replica'),
+            count_cache_key(TestModel1, 'default')
+        )
+        self.assertEqual(CountPaginator(
+            TestModel1.objects.using('replica').all(), 10
+        ).count, 2)
+
+    def test_registry_is_read_from_primary(self):
+        registry.add_models(['testapp.TestModel1'])
+        registry.invalidate()  # e.g. changed by another process
+        with use_replica('replica'):
+            self.assertEqual(registry.get_labels(), ('testapp.TestModel1',))
+        self.assertEqual(registry.get_labels(), ('testapp.TestModel1',))
+
+    @override_settings(MYADMIN_REPLICAS=[])
+    def test_disabled_without_replicas(self):
+        self.assertContains(self.client.get(self.list_url), 'on primary')
+
+
+class OptimisticConcurrencyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(self.user)
+        self.obj = TestModel1.objects.create(text='a', integer=1)
+        self.edit_url = reverse('myadmin:edit', kwargs={
+            'model_name': 'testapp.TestModel1', 'obj_pk': self.obj.pk
+        })
+        self.api_url = reverse('myadmin:model-detail', kwargs={
+            'model_name': 'testapp.TestModel1', 'pk': self.obj.pk
+        })
+
+    def updates(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+
+    def test_edit_writes_changed_fields_only(self):
+        version = self.client.get(self.edit_url).context['version']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.edit_url, {
+                'text': 'b', 'integer': 1, '_version': version
+            })
+        self.assertEqual(response.status_code, 302)
+        updates = self.updates(queries)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "text" = ', updates[0])
+        self.assertNotIn('"integer" =', updates[0].split('WHERE')[0])
+        self.assertEqual(TestModel1.objects.get(pk=self.obj.pk).text, 'b')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.edit_url, {'text': 'b', 'integer': 1})
+        self.assertEqual(self.updates(queries), [])
+
+    def test_edit_detects_concurrent_change(self):
+        version = self.client.get(self.edit_url).context['version']
+        TestModel1.objects.filter(pk=self.obj.pk).update(integer=2)
+        response = self.client.post(self.edit_url, {
+            'text': 'b', 'integer': 1, '_version': version
+        })
+        self.assertContains(
+            response, 'changed by someone else', status_code=409
+        )
+        self.assertEqual(
+            TestModel1.objects.get(pk=self.obj.pk).integer, 2
+        )
+
+        response = self.client.post(self.edit_url, {
+            'text': 'b', 'integer': 1, '_version': 'forged'
+        })
+        self.assertEqual(response.status_code, 409)
+
+    def test_api_version_header(self):
+        version = self.client.get(self.api_url)['X-Object-Version']
+        response = self.client.patch(
+            self.api_url, json.dumps({'integer': 5}), 'application/json',
+            HTTP_X_OBJECT_VERSION=version
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['X-Object-Version'], version)
+
+        response = self.client.patch(
+            self.api_url, json.dumps({'integer': 6}), 'application/json',
+            HTTP_X_OBJECT_VERSION=version
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            TestModel1.objects.get(pk=self.obj.pk).integer, 5
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.api_url, json.dumps({'integer': 5}), 'application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.updates(queries), [])
+
+
+    def test_token_is_small_and_opaque(self):
+        token = concurrency.get_token(self.user)
+        self.assertLess(len(token), 200)
+        self.assertNotIn(self.user.password, json.dumps(
+            signing.loads(token, salt=concurrency.TOKEN_SALT)
+        ))
+
+    def test_many_to_many_changes_are_checked(self):
+        group = Group.objects.create(name='editors')
+        url = reverse('myadmin:model-detail', kwargs={
+            'model_name': 'auth.User', 'pk': self.user.pk
+        })
+        version = self.client.get(url)['X-Object-Version']
+        User.objects.filter(pk=self.user.pk).update(first_name='Max')
+        response = self.client.patch(
+            url, json.dumps({'groups': [group.pk]}), 'application/json',
+            HTTP_X_OBJECT_VERSION=version
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.user.groups.exists())
+
+        version = self.client.get(url)['X-Object-Version']
+        response = self.client.patch(
+            url, json.dumps({'groups': [group.pk]}), 'application/json',
+            HTTP_X_OBJECT_VERSION=version
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.user.groups.all()), [group])
+
+
+@override_settings(MYADMIN_AUTOCOMPLETE_THRESHOLD=20)
+class AutocompleteTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(self.user)
+        BenchCategory.objects.bulk_create([
+            BenchCategory(name='category {:02}'.format(i)) for i in range(25)
+        ])
+        self.parent = TestModel1.objects.create(text='parent', integer=1)
+        self.url = reverse('myadmin:autocomplete', kwargs={
+            'model_name': 'testapp.BenchRelated', 'field_name': 'category'
+        })
+
+    def test_large_relations_render_selected_choices_only(self):
+        response = self.client.get(reverse('myadmin:create', kwargs={
+            'model_name': 'testapp.BenchRelated'
+        }))
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, 'category 00')
+        self.assertContains(response, 'parent')  # small table, all choices
+
+        obj = BenchRelated.objects.create(
+            name='x', category=BenchCategory.objects.get(name='category 07'),
+            parent=self.parent,
+            wide=BenchWide.objects.create(char_1='wide')
+        )
+        response = self.client.get(reverse('myadmin:edit', kwargs={
+            'model_name': 'testapp.BenchRelated', 'obj_pk': obj.pk
+        }))
+        self.assertContains(response, 'category 07')
+        self.assertNotContains(response, 'category 08')
+
+    def test_prefix_search_with_keyset_pages(self):
+        data = self.client.get(self.url, {'q': 'category 1'}).json()
+        self.assertEqual(
+            [item['text'] for item in data['results']],
+            ['category {}'.format(i) for i in range(10, 20)]
+        )
+        self.assertIsNone(data['next'])
+
+        first = self.client.get(self.url).json()
+        self.assertEqual(len(first['results']), 20)
+        second = self.client.get(self.url, {'cursor': first['next']}).json()
+        self.assertEqual(
+            [item['text'] for item in second['results']],
+            ['category {}'.format(i) for i in range(20, 25)]
+        )
+        self.assertIsNone(second['next'])
+
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_permissions_and_unknown_fields(self):
+        user = User.objects.create_user('log2', 'b@b.b', 'qw12')
+        user.user_permissions.add(Permission.objects.get(
+            codename='access_panel'
+        ))
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('myadmin:autocomplete', kwargs={
+            'model_name': 'testapp.BenchRelated', 'field_name': 'name'
+        }))
+        self.assertEqual(response.status_code, 404)
+
+        # may change BenchRelated, but not see the categories
+        user.user_permissions.add(Permission.objects.get(
+            codename='change_benchrelated'
+        ))
+        self.client.force_login(User.objects.get(pk=user.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        user.user_permissions.add(Permission.objects.get(
+            codename='change_benchcategory'
+        ))
+        self.client.force_login(User.objects.get(pk=user.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_pages_over_null_values(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='same') for _ in range(15)] +
+            [TestModel1(text=None) for _ in range(15)]
+        )
+        view = AutocompleteView()
+        ids, position = [], None
+        while True:
+            objs = list(view.filter_queryset(
+                TestModel1.objects.all(), 'text', '', position
+            )[:11])
+            ids.extend(obj.pk for obj in objs[:10])
+            if len(objs) <= 10:
+                break
+            position = [objs[9].text, objs[9].pk]
+        # 'parent' < 'same', the rows without text come last
+        same, null = [
+            list(TestModel1.objects.filter(text=text).order_by(
+                'pk'
+            ).values_list('pk', flat=True)) for text in ('same', None)
+        ]
+        self.assertEqual(ids, [self.parent.pk] + same + null)
+        self.assertEqual(view.filter_queryset(
+            TestModel1.objects.all(), 'text', 'sa', None
+        ).count(), 15)
+
+
+@override_settings(MYADMIN_FILTER_SCAN_THRESHOLD=0)
+class OrderingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('log1', 'a@a.a', 'qw12')
+        self.client.force_login(self.user)
+        BenchCategory.objects.bulk_create([
+            BenchCategory(name=name) for name in 'cabdfge'
+        ])
+
+    def api_url(self, label):
+        return reverse('myadmin:model-list', kwargs={'model_name': label})
+
+    def test_get_ordering(self):
+        self.assertEqual(
+            get_ordering(BenchCategory, '-name'), ['-name', '-pk']
+        )
+        self.assertEqual(
+            get_ordering(BenchRelated, 'category'), ['category_id', 'pk']
+        )
+        self.assertEqual(get_ordering(BenchCategory, '-pk'), ['-id'])
+        # composite index prefixes, in one direction
+        self.assertEqual(
+            get_ordering(Permission, 'content_type,codename'),
+            ['content_type_id', 'codename', 'pk']
+        )
+        for value in ('codename', 'content_type,-codename', 'unknown',
+                      'name,name', ''):
+            with self.assertRaises(ValidationError):
+                get_ordering(Permission, value)
+
+    def test_api_ordering_with_cursor_pages(self):
+        url = self.api_url('testapp.BenchCategory')
+        response = self.client.get(url, {'ordering': '-name'})
+        first = [obj['name'] for obj in response.data['results']]
+        self.assertEqual(first, ['g', 'f', 'e', 'd', 'c'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [obj['name'] for obj in response.data['results']], ['b', 'a']
+        )
+
+        response = self.client.get(url, {'ordering': 'id', 'fields': 'id'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_cursor_pages_over_duplicates(self):
+        BenchCategory.objects.bulk_create([
+            BenchCategory(name='same {}'.format(i % 3)) for i in range(30)
+        ])
+        response = self.client.get(
+            self.api_url('testapp.BenchCategory'),
+            {'ordering': '-name', 'page_size': 5}
+        )
+        ids = []
+        while True:
+            ids.extend(obj['id'] for obj in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(ids, list(
+            BenchCategory.objects.order_by('-name', '-pk').values_list(
+                'pk', flat=True
+            )
+        ))
+
+    @override_settings(MYADMIN_FILTER_UNINDEXED=['testapp.TestModel1'])
+    def test_nullable_columns_are_refused(self):
+        TestModel1.objects.bulk_create(
+            [TestModel1(text='same', integer=i) for i in range(20)] +
+            [TestModel1(text=None, integer=i) for i in range(10)]
+        )
+        with self.assertRaises(ValidationError):
+            get_ordering(TestModel1, '-text', cursor=True)
+        self.assertNotIn('text', get_sort_fields(TestModel1, cursor=True))
+        response = self.client.get(
+            self.api_url('testapp.TestModel1'),
+            {'ordering': '-text', 'page_size': 5}
+        )
+        self.assertEqual(response.status_code, 400)
+
+        # numbered pages do not compare the values
+        self.assertIn('text', get_sort_fields(TestModel1))
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.TestModel1'
+        })
+        response = self.client.get(url, {'ordering': 'text', 'page': 2})
+        self.assertEqual(
+            list(response.context['object_list']),
+            list(TestModel1.objects.order_by('text', 'pk')[15:30])
+        )
+        with self.settings(MYADMIN_LIST_PAGINATION='keyset'):
+            response = self.client.get(url, {'ordering': 'text'})
+        self.assertTrue(response.context['ordering_error'])
+
+    def test_unindexed_columns_need_configuration(self):
+        BenchWide.objects.create(char_1='b')
+        BenchWide.objects.create(char_1='a')
+        url = self.api_url('testapp.BenchWide')
+        response = self.client.get(url, {'ordering': 'char_1'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+        with self.settings(MYADMIN_FILTER_UNINDEXED=['testapp.BenchWide']):
+            response = self.client.get(url, {'ordering': 'char_1'})
+        self.assertEqual(
+            [obj['char_1'] for obj in response.data['results']], ['a', 'b']
+        )
+
+    def test_list_view_sort_links(self):
+        url = reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.BenchCategory'
+        })
+        response = self.client.get(url, {'ordering': '-name'})
+        self.assertEqual(
+            [obj.name for obj in response.context['object_list']],
+            ['g', 'f', 'e', 'd', 'c', 'b', 'a']
+        )
+        links = {
+            name: (query, direction)
+            for name, query, direction in response.context['sort_fields']
+        }
+        self.assertEqual(links['name'], ('ordering=name', 'desc'))
+        self.assertEqual(links['id'], ('ordering=id', None))
+
+        response = self.client.get(reverse('myadmin:objects', kwargs={
+            'model_name': 'testapp.BenchWide'
+        }), {'ordering': 'char_1'})
+        self.assertContains(response, 'needs an index')
@@ -0,0 +1,256 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import resolve, Resolver404
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+
+
+VIEWS_KEY = 'myadmin:timing:views'
+METRICS = ('total', 'sql', 'queries', 'template', 'serializer')
+# upper bounds of the histogram buckets, milliseconds or queries
+BUCKETS = (
+    0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+    float('inf'),
+)
+
+_local = threading.local()
+
+
+class RequestMetrics(object):
+    """
+    Durations (milliseconds) and query count of one request.
+    """
+    def __init__(self):
+        self.values = dict.fromkeys(METRICS, 0)
+
+    def add(self, name, value):
+        self.values[name] += value
+
+
+def current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the duration of the block to metric `name` of the current
+    request, if it is instrumented.
+    """
+    metrics = current_metrics()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add(name, (time.perf_counter() - start) * 1000)
+
+
+def server_timing(metrics):
+    values = metrics.values
+    return ', '.join([
+        'total;dur={:.1f}'.format(values['total']),
+        'sql;dur={:.1f};desc="{} queries"'.format(
+            values['sql'], values['queries']
+        ),
+        'template;dur={:.1f}'.format(values['template']),
+        'serializer;dur={:.1f}'.format(values['serializer']),
+    ])
+
+
+def get_window():
+    """
+    Seconds covered by the recorded histograms, MYADMIN_TIMING_WINDOW.
+    """
+    return getattr(settings, 'MYADMIN_TIMING_WINDOW', 3600)
+
+
+def timing_key(view_name, window, name, bucket=None):
+    return 'myadmin:timing:{}:{}:{}:{}'.format(
+        view_name, window, name, '' if bucket is None else bucket
+    )
+
+
+def _increment(key, timeout):
+    if not cache.add(key, 1, timeout):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass  # expired in between, the sample is lost
+
+
+def record(view_name, metrics):
+    """
+    Count `metrics` in the histograms of the view in the shared cache,
+    with one atomic increment per metric. Histograms are kept per window
+    of MYADMIN_TIMING_WINDOW seconds for two windows.
+    """
+    window_size = get_window()
+    window = int(time.time() // window_size)
+    timeout = 2 * window_size
+    _increment(timing_key(view_name, window, 'count'), timeout)
+    for name in METRICS:
+        bucket = bisect.bisect_left(BUCKETS, metrics.values[name])
+        _increment(timing_key(view_name, window, name, bucket), timeout)
+    views = cache.get(VIEWS_KEY) or set()
+    if view_name not in views:
+        cache.set(VIEWS_KEY, views | {view_name}, None)
+
+
+def percentile(counts, fraction):
+    """
+    Nearest-rank percentile of a histogram, the upper bound of the bucket
+    it falls in. `counts` are the sample counts of the BUCKETS.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = max(int(math.ceil(fraction * total)), 1)
+    seen = 0
+    for bound, count in zip(BUCKETS, counts):
+        seen += count
+        if seen >= rank:
+            return bound
+
+
+def get_aggregates():
+    """
+    `{view name: {metric: {'p50': .., 'p95': .., 'p99': ..}}}` and the
+    number of samples under 'count', over the current and the previous
+    window.
+    """
+    window = int(time.time() // get_window())
+    result = {}
+    for view_name in sorted(cache.get(VIEWS_KEY) or ()):
+        windows = (window - 1, window)
+        keys = [timing_key(view_name, w, 'count') for w in windows]
+        for name in METRICS:
+            keys.extend(
+                timing_key(view_name, w, name, bucket)
+                for w in windows for bucket in range(len(BUCKETS))
+            )
+        values = cache.get_many(keys)
+        count = sum(values.get(key, 0) for key in keys[:2])
+        if not count:
+            continue
+        aggregates = {'count': count}
+        for name in METRICS:
+            counts = [
+                sum(
+                    values.get(timing_key(view_name, w, name, bucket), 0)
+                    for w in windows
+                ) for bucket in range(len(BUCKETS))
+            ]
+            aggregates[name] = {
+                'p50': percentile(counts, 0.5),
+                'p95': percentile(counts, 0.95),
+                'p99': percentile(counts, 0.99),
+            }
+        result[view_name] = aggregates
+    return result
+
+
+class TimedCursorWrapper(CursorWrapper):
+    """
+    Counts the queries of a cursor and their duration into the metrics
+    of the current request.
+    """
+    def execute(self, sql, params=None):
+        with timed_query():
+            return super(TimedCursorWrapper, self).execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        with timed_query():
+            return super(TimedCursorWrapper, self).executemany(
+                sql, param_list
+            )
+
+    def callproc(self, procname, params=None):
+        with timed_query():
+            return super(TimedCursorWrapper, self).callproc(procname, params)
+
+
+@contextmanager
+def timed_query():
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.add('queries', 1)
+    with timed('sql'):
+        yield
+
+
+@contextmanager
+def count_queries():
+    """
+    Wrap the cursors of the database connections of this thread with
+    TimedCursorWrapper within the block. Unlike CaptureQueriesContext
+    this neither connects to every database nor keeps the queries.
+    """
+    wrapped = []
+    for connection in connections.all():
+        for name in ('cursor', 'chunked_cursor'):
+            method = getattr(connection, name)
+            setattr(connection, name, _timed_cursor(connection, method))
+        wrapped.append(connection)
+    try:
+        yield
+    finally:
+        for connection in wrapped:
+            del connection.cursor
+            del connection.chunked_cursor
+
+
+def _timed_cursor(connection, method):
+    def cursor(*args, **kwargs):
+        return TimedCursorWrapper(method(*args, **kwargs), connection)
+    return cursor
+
+
+class TimingMiddleware(object):
+    """
+    Opt-in instrumentation of views of the `myadmin` namespace.
+
+    Adds a Server-Timing header with the total, SQL, template and
+    serializer time and the query count, and records them per view for
+    the timing page of the panel.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            match = None
+        if match is None or 'myadmin' not in match.namespaces:
+            return self.get_response(request)
+
+        metrics = _local.metrics = RequestMetrics()
+        start = time.perf_counter()
+        try:
+            with count_queries():
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        metrics.add('total', (time.perf_counter() - start) * 1000)
+        response['Server-Timing'] = server_timing(metrics)
+        record(match.view_name, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.add(
+                    'template', (time.perf_counter() - start) * 1000
+                )
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,103 @@
+import threading
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed
+
+from myadmin import registry
+from myadmin.catalog import catalog
+
+
+# Receivers connected without a sender run for every model of the project
+# and turn off Django's fast deletes, which `QuerySet.delete()` can only
+# use for models without delete signal receivers. The receivers of
+# `connect` are connected for the tracked models only: the panel models
+# and the models their rows may render. Each process re-wires them when
+# it sees a new registry version, at the start of every request and right
+# after changing the registry itself.
+_receivers = []
+_tracked = {'version': None, 'models': frozenset(), 'through': frozenset()}
+_lock = threading.Lock()
+
+
+def _related_models(model, depth=0):
+    # the relations `planner.display_relations` may find for `model`
+    for field in model._meta.concrete_fields:
+        if not (field.many_to_one or field.one_to_one):
+            continue
+        yield field.related_model
+        if depth < getattr(settings, 'MYADMIN_PLANNER_DEPTH', 2):
+            for related in _related_models(field.related_model, depth + 1):
+                yield related
+
+
+def models_for(model):
+    """
+    `model` and the models tracked along with it.
+    """
+    return {model}.union(_related_models(model))
+
+
+def _tracked_models(labels):
+    models = set()
+    for label in labels:
+        try:
+            models.update(models_for(catalog.get_model(label)))
+        except LookupError:
+            continue
+    return frozenset(models)
+
+
+def _wire(connect, models, through):
+    for signal, receiver, dispatch_uid in _receivers:
+        senders = through if signal is m2m_changed else models
+        for sender in senders:
+            if connect:
+                signal.connect(
+                    receiver, sender=sender, dispatch_uid=dispatch_uid
+                )
+            else:
+                signal.disconnect(sender=sender, dispatch_uid=dispatch_uid)
+
+
+def sync(**kwargs):
+    """
+    Connect the receivers for the models of the current registry version
+    and disconnect them from the others. A `request_started` receiver.
+    """
+    version = registry.get_version()
+    if version is not None and _tracked['version'] == version:
+        return
+    with _lock:
+        models = _tracked_models(registry.get_labels())
+        through = frozenset(
+            field.remote_field.through
+            for model in models for field in model._meta.many_to_many
+        )
+        old_models, old_through = _tracked['models'], _tracked['through']
+        _wire(False, old_models - models, old_through - through)
+        _wire(True, models - old_models, through - old_through)
+        _tracked.update(version=version, models=models, through=through)
+
+
+def connect(signal, receiver, dispatch_uid):
+    """
+    Connect `receiver` to `signal` sent by the tracked models, or by the
+    through models of their many-to-many fields for `m2m_changed`.
+    """
+    with _lock:
+        _receivers.append((signal, receiver, dispatch_uid))
+        senders = (
+            _tracked['through'] if signal is m2m_changed
+            else _tracked['models']
+        )
+        for sender in senders:
+            signal.connect(receiver, sender=sender, dispatch_uid=dispatch_uid)
+
+
+def is_tracked(model):
+    """
+    Whether changes of `model` rows reach the receivers, so the counts and
+    versions cached for it are kept up to date.
+    """
+    sync()
+    return model in _tracked['models']
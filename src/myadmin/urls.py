@@ -1,14 +1,15 @@
 from django.conf.urls import url, include
 from django.contrib.auth.decorators import login_required
-from rest_framework import routers
 
 from myadmin import views
+from myadmin.api.routers import BulkRouter
 from myadmin.api.views import GeneralViewSet
 
 
 # views are named model-list and model-detail
 # model-detail takes second argument called 'pk'
-router = routers.SimpleRouter()
+# model-list also accepts bulk POST, PATCH and DELETE
+router = BulkRouter()
 router.register(
     r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)',
     GeneralViewSet,
@@ -20,18 +21,55 @@ urlpatterns = [
     url(r'^$', views.AdminPanelView.as_view(), name='panel'),
     url(r'^api/', include(router.urls)),
     url(r'^api-auth/', include('rest_framework.urls')),
+    url(
+        r'^timing$',
+        login_required(views.TimingView.as_view()),
+        name='timing'
+    ),
+    url(
+        r'^search$',
+        login_required(views.SearchView.as_view()),
+        name='search'
+    ),
+    url(
+        r'^autocomplete/'
+        r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)/'
+        r'(?P<field_name>[0-9A-Za-z_]+)$',
+        login_required(views.AutocompleteView.as_view()),
+        name='autocomplete'
+    ),
     url(
         r'^objects/'
         r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)$',
         login_required(views.ModelListView.as_view()),
         name='objects'
     ),
+    url(
+        r'^export/'
+        r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)[.]'
+        r'(?P<export_format>csv|jsonl)$',
+        login_required(views.ExportView.as_view()),
+        name='export'
+    ),
+    url(
+        r'^import/'
+        r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)$',
+        login_required(views.ImportView.as_view()),
+        name='import'
+    ),
     url(
         r'^create/'
         r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)$',
         login_required(views.ObjectCreateView.as_view()),
         name='create'
     ),
+    url(
+        r'^objects/'
+        r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)/'
+        r'delete$',
+        login_required(views.ObjectBulkDeleteView.as_view()),
+        name='bulk_delete'
+    ),
     url(
         r'^objects/'
         r'(?P<model_name>[0-9A-Za-z_]+[.][0-9A-Za-z_]+)/'
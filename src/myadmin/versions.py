@@ -0,0 +1,188 @@
+import hashlib
+import math
+import time
+import uuid
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import utc
+from django.views.decorators.http import condition
+
+from myadmin import registry
+from myadmin.catalog import catalog
+from myadmin.permissions import get_permissions
+from myadmin.planner import display_relations
+from myadmin.routers import current_replica
+from myadmin.tracking import is_tracked, models_for
+
+
+def version_key(model):
+    return 'myadmin:version:{}'.format(model._meta.label_lower)
+
+
+def _new_version():
+    return (uuid.uuid4().hex, time.time())
+
+
+def get_version(model):
+    """
+    `(token, timestamp)` of the last change of `model` rows, kept in the
+    shared cache. A missing entry starts a new version.
+    """
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key) or _new_version()
+    return version
+
+
+def bump(model):
+    cache.set(version_key(model), _new_version(), None)
+
+
+def _changed(model, using):
+    # once right away and once more when the change becomes visible
+    bump(model)
+    transaction.on_commit(lambda: bump(model), using=using)
+
+
+def model_changed(sender, using, **kwargs):
+    _changed(sender, using)
+
+
+def model_m2m_changed(sender, instance, model, using, action, **kwargs):
+    if action.startswith('post_'):
+        _changed(type(instance), using)
+        _changed(model, using)
+
+
+def models_added(sender, labels, using, **kwargs):
+    for label in labels:
+        try:
+            models = models_for(catalog.get_model(label))
+        except LookupError:
+            continue
+        for model in models:
+            _changed(model, using)
+
+
+def related_models(model, paths):
+    """
+    Models reached by following the select_related style `paths`.
+    """
+    result = []
+    for path in paths:
+        current = model
+        for name in path.split('__'):
+            current = current._meta.get_field(name).related_model
+        result.append(current)
+    return result
+
+
+def rendered_models(model):
+    """
+    `model` and the models its __str__ renders, as far as known without
+    querying. Until `model` is probed its rows were not rendered either.
+    """
+    relations = display_relations(model, probe=False)
+    return [model] + related_models(model, relations)
+
+
+def get_etag(request, models, *extra):
+    """
+    Tag of the versions of `models` as seen by the user of `request`, its
+    permissions and the requested representation.
+    """
+    user = request.user
+    parts = [get_version(model)[0] for model in models]
+    parts.extend([
+        request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+        str(user.pk), str(user.is_superuser),
+    ])
+    if user.is_authenticated:
+        parts.extend(sorted(get_permissions(user)))
+    parts.extend(extra)
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def get_last_modified(models):
+    """
+    Time of the last change of `models` rounded up to the second, None
+    until that second is over: a later change within it would get the
+    same Last-Modified.
+    """
+    timestamp = math.ceil(max(get_version(model)[1] for model in models))
+    if timestamp > time.time():
+        return None
+    return datetime.fromtimestamp(timestamp, utc)
+
+
+def primary_only(func):
+    """
+    No validators for responses read from a replica: the versions are
+    bumped by writes to the default database, before a replica has them.
+    """
+    def wrapper(*args, **kwargs):
+        if current_replica() is not None:
+            return None
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _view_models(model_name, rendered):
+    # versions of untracked models are not bumped, they cannot validate
+    try:
+        model = catalog.get_model(model_name)
+    except LookupError:
+        return None
+    models = rendered_models(model) if rendered else [model]
+    return models if all(map(is_tracked, models)) else None
+
+
+def _condition(rendered):
+    @primary_only
+    def etag_func(request, model_name, *args, **kwargs):
+        models = _view_models(model_name, rendered)
+        return models and get_etag(request, models)
+
+    @primary_only
+    def last_modified_func(request, model_name, *args, **kwargs):
+        models = _view_models(model_name, rendered)
+        return models and get_last_modified(models)
+
+    return condition(
+        etag_func=etag_func, last_modified_func=last_modified_func
+    )
+
+
+# for views rendering `str()` of the objects and for serialized objects
+list_condition = _condition(rendered=True)
+api_condition = _condition(rendered=False)
+
+
+def _panel_models():
+    models = []
+    for label in registry.get_labels():
+        try:
+            models.extend(rendered_models(catalog.get_model(label)))
+        except LookupError:
+            continue
+    return models
+
+
+@primary_only
+def _panel_etag(request, *args, **kwargs):
+    return get_etag(request, _panel_models(), registry.get_version() or '')
+
+
+@primary_only
+def _panel_last_modified(request, *args, **kwargs):
+    models = _panel_models()
+    return get_last_modified(models) if models else None
+
+
+panel_condition = condition(
+    etag_func=_panel_etag, last_modified_func=_panel_last_modified
+)
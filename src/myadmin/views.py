@@ -1,122 +1,266 @@
+import base64
+import hashlib
 import json
 
-from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.shortcuts import (
-    render,
-    redirect,
-    get_object_or_404
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.db.models import F, ProtectedError, Q
+from django.forms import ModelChoiceField
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse
 )
+from django.shortcuts import redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.utils.cache import add_never_cache_headers
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views import View
 from django.views.generic.list import ListView
+from rest_framework.request import Request
+
+from myadmin import (
+    bulk,
+    concurrency,
+    export,
+    parallel,
+    registry,
+    search,
+    timing,
+    versions
+)
+from myadmin.api.pagination import ModelCursorPagination
+from myadmin.catalog import catalog
+from myadmin.counts import CountPaginator
+from myadmin.filters import (
+    create_filterset,
+    get_ordering,
+    get_sort_fields,
+    prefix_range,
+)
+from myadmin.forms import ImportForm, autocomplete_field, create_form
+from myadmin.importer import Importer, iter_records
+from myadmin.permissions import (
+    can,
+    can_any,
+    can_label,
+    has_perm,
+)
+from myadmin.planner import plan_for_display
+from myadmin.routers import current_replica
+
+
+class PanelPermissionMixin(PermissionRequiredMixin):
+    """
+    PermissionRequiredMixin checking with the cached permission set.
+    """
+    def has_permission(self):
+        return all(
+            has_perm(self.request.user, perm)
+            for perm in self.get_permission_required()
+        )
 
-from myadmin.models import AdminPanel
-from myadmin.forms import create_form
+    def get_model_info(self, model_name, action=None):
+        """
+        Catalog entry of `model_name`. The `action` permission (any of add,
+        change and delete without one) is checked first, so users without
+        it get 403 whether the model exists or not; LookupError is raised
+        for unknown models.
+        """
+        user = self.request.user
+        actions = ('add', 'change', 'delete') if action is None else [action]
+        if not any(can_label(user, name, model_name) for name in actions):
+            raise PermissionDenied
+        info = catalog.get(model_name)
+        if not any(can(user, name, info.model) for name in actions):
+            raise PermissionDenied
+        return info
 
 
-class AdminPanelView(PermissionRequiredMixin, View):
+class AdminPanelView(PanelPermissionMixin, View):
     """
     View for custom admin panel.
     """
     permission_required = 'myadmin.access_panel'
     raise_exception = True
     template_name = 'myadmin/admin.html'
-    models = apps.get_models()
-    admin_panel = AdminPanel.objects.first()
+    fragment_template_name = 'myadmin/panel_model.html'
+    loading_template_name = 'myadmin/panel_model_loading.html'
     paginate_by = 6
 
     def get_existing_models(self):
-        if self.admin_panel.models_text:
-            existing_models = json.loads(self.admin_panel.models_text)
-        else:
-            return list()
-
         result = []
-        str_models = list(map(str, self.models))
-        for obj in existing_models:
-            result.append(self.models[str_models.index(obj)])
+        for label in registry.get_labels():
+            try:
+                result.append(catalog.get_model(label))
+            except LookupError:
+                continue  # model is no longer installed
         return result
 
+    def get_removable_models(self):
+        return [
+            model for model in self.get_existing_models()
+            if can_any(self.request.user, model)
+        ]
+
     def get_add_models_names(self, get_objects=False):
-        result = []
-        if not self.admin_panel.models_text:
-            if get_objects:
-                return self.models
-            return [(obj._meta.app_label, obj.__name__) for obj in self.models]
-        existing = json.loads(self.admin_panel.models_text)
-        for obj in self.models:
-            if str(obj) not in existing:
-                if get_objects:
-                    result.append(obj)
-                else:
-                    result.append((obj._meta.app_label, obj.__name__))
-        return result
+        # only models the user can add, change or delete objects of
+        existing = set(registry.get_labels())
+        available = [
+            info for info in catalog
+            if info.label not in existing and
+            can_any(self.request.user, info.model)
+        ]
+        if get_objects:
+            return [info.model for info in available]
+        return [(info.app_label, info.name) for info in available]
 
     def get_remove_models_names(self):
-        existing = self.get_existing_models()
-        return [(obj._meta.app_label, obj.__name__) for obj in existing]
+        return [
+            (info.app_label, info.name)
+            for info in map(catalog.get, self.get_removable_models())
+        ]
+
+    def get_model_page(self, request, model):
+        label = catalog.get(model).label
+        # Paginator slices the queryset, so only a single page of rows
+        # is fetched (LIMIT/OFFSET) instead of the whole table.
+        queryset = plan_for_display(model.objects.all())
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        paginator = CountPaginator(queryset, self.paginate_by)
+        return paginator.get_page(request.GET.get(label))
 
     def create_models_data(self, request):
-        models = []
-        existing_models = self.get_existing_models()
-
-        for obj in existing_models:
-            obj_name = '{}.{}'.format(obj._meta.app_label, obj.__name__)
-            obj_list = list(obj.objects.all())
-            paginator = Paginator(obj_list, self.paginate_by)
-
-            page = request.GET.get(obj_name)
-            try:
-                model_objects = paginator.page(page)
-            except PageNotAnInteger:
-                model_objects = paginator.page(1)
-            except EmptyPage:
-                model_objects = paginator.page(paginator.num_pages)
+        return [
+            [catalog.get(obj).label, self.get_model_page(request, obj)]
+            for obj in self.get_existing_models()
+        ]
+
+    def get_fragment_key(self, request, model):
+        """
+        Cache key of the summary table of `model`, per page, permission
+        set and version of the rendered models.
+        """
+        info = catalog.get(model)
+        perms = [
+            action for action in sorted(info.perms)
+            if can(request.user, action, model)
+        ]
+        parts = [
+            info.label, request.GET.get(info.label, ''), ','.join(perms)
+        ] + [
+            versions.get_version(related)[0]
+            for related in versions.rendered_models(model)
+        ]
+        return 'myadmin:fragment:{}'.format(
+            hashlib.md5('|'.join(parts).encode()).hexdigest()
+        )
 
-            models.append([obj_name, model_objects])
-        return models
+    def load_model_page(self, request, model):
+        """
+        Page of `model` with its rows fetched, so it can be loaded on
+        another thread and rendered on this one.
+        """
+        page = self.get_model_page(request, model)
+        page.object_list = list(page.object_list)
+        return page
+
+    def load_model_pages(self, request, models):
+        """
+        Pages of `models` in their order, loaded concurrently when
+        MYADMIN_PANEL_WORKERS is set. Pages which are not loaded within
+        MYADMIN_PANEL_TIMEOUT seconds are None.
+        """
+        if parallel.get_workers() and len(models) > 1:
+            return parallel.run_parallel(
+                self.load_model_page, [(request, model) for model in models]
+            )
+        return [self.get_model_page(request, model) for model in models]
+
+    def render_models_data(self, request):
+        """
+        Summary tables of the panel models, rendered from the cache when
+        their rows did not change. Tables read from a replica are not
+        cached, they may predate the version they would be cached under.
+        """
+        timeout = getattr(settings, 'MYADMIN_FRAGMENT_CACHE_TIMEOUT', 3600)
+        self.partial = False
+        existing = self.get_existing_models()
+        labels = [catalog.get(obj).label for obj in existing]
+        keys = [self.get_fragment_key(request, obj) for obj in existing]
+        fragments = [cache.get(key) for key in keys]
+        missing = [
+            index for index, html in enumerate(fragments) if html is None
+        ]
+        pages = self.load_model_pages(
+            request, [existing[index] for index in missing]
+        )
+        for index, page in zip(missing, pages):
+            with timing.timed('template'):
+                if page is None:
+                    # not cached, so it is loaded again on the next view
+                    self.partial = True
+                    fragments[index] = render_to_string(
+                        self.loading_template_name, {'label': labels[index]}
+                    )
+                    continue
+                fragments[index] = render_to_string(
+                    self.fragment_template_name,
+                    {'label': labels[index], 'page': page}
+                )
+            if current_replica() is None:
+                cache.set(keys[index], fragments[index], timeout)
+        return [
+            [label, mark_safe(html)] for label, html in zip(labels, fragments)
+        ]
 
     def get(self, request, *args, **kwargs):
+        response = self.conditional_get(request, *args, **kwargs)
+        if getattr(self, 'partial', False):
+            # the versions do not change when the placeholders are loaded,
+            # so the page must not be revalidated or stored
+            del response['ETag']
+            del response['Last-Modified']
+            add_never_cache_headers(response)
+        return response
+
+    @method_decorator(versions.panel_condition)
+    def conditional_get(self, request, *args, **kwargs):
         context = {
-            'models_view': self.create_models_data(request),
+            'models_view': self.render_models_data(request),
             'models_select': self.get_add_models_names(),
             'models_remove': self.get_remove_models_names()
         }
-        return render(request, self.template_name, context=context)
+        return TemplateResponse(request, self.template_name, context=context)
 
     def post(self, request, *args, **kwargs):
         if 'add' in request.POST:
             model_indexes = request.POST.getlist('select_models')
-            models = []
-            for index in map(int, model_indexes):
-                obj = self.get_add_models_names(get_objects=True)[index]
-                models.append(str(obj))
-            if not self.admin_panel.models_text:
-                self.admin_panel.models_text = json.dumps(models)
-            else:
-                self.admin_panel.models_text = json.dumps(
-                    json.loads(self.admin_panel.models_text) + models
-                )
-            self.admin_panel.save()
+            available = self.get_add_models_names(get_objects=True)
+            registry.add_models([
+                available[index]._meta.label
+                for index in map(int, model_indexes)
+            ])
         elif 'remove' in request.POST:
             model_indexes = request.POST.getlist('remove_models')
             if not model_indexes:
                 return self.get(request, *args, **kwargs)
-            models = []
-            existing = self.get_existing_models()
-            for index in map(int, model_indexes):
-                obj = existing[index]
-                models.append(obj)
-            for obj in models:
-                existing.remove(obj)
-            self.admin_panel.models_text = json.dumps(list(map(str, existing)))
-            self.admin_panel.save()
+            existing = self.get_removable_models()
+            registry.remove_models([
+                existing[index]._meta.label
+                for index in map(int, model_indexes)
+            ])
         return self.get(request, *args, **kwargs)
 
 
-class ModelListView(PermissionRequiredMixin, ListView):
+class ModelListView(PanelPermissionMixin, ListView):
     permission_required = 'myadmin.access_panel'
     raise_exception = True
     template_name = 'myadmin/objects_view.html'
@@ -126,123 +270,533 @@ class ModelListView(PermissionRequiredMixin, ListView):
     def get_queryset(self):
         model_name = self.kwargs.pop('model_name')
         self.model_name = model_name
-        model = apps.get_model(model_name)
-        queryset = model.objects.all()
-        return queryset
+        self.model_info = catalog.get(model_name)
+        queryset = self.model_info.model.objects.all()
+        self.sort_ordering, self.ordering_error = None, None
+        value = self.request.GET.get('ordering', '').strip()
+        if value:
+            try:
+                self.sort_ordering = get_ordering(
+                    self.model_info.model, value,
+                    cursor=self.get_pagination_mode() == 'keyset'
+                )
+            except ValidationError as error:
+                self.ordering_error = error.messages[0]
+        if self.sort_ordering:
+            queryset = queryset.order_by(*self.sort_ordering)
+        elif not queryset.ordered:
+            # stable offset pages, like the panel
+            queryset = queryset.order_by('pk')
+        self.filterset = create_filterset(self.model_info.model)(
+            self.request.GET or None, queryset=plan_for_display(queryset)
+        )
+        return self.filterset.qs
+
+    @method_decorator(versions.list_condition)
+    def get(self, request, *args, **kwargs):
+        return super(ModelListView, self).get(request, *args, **kwargs)
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return CountPaginator(queryset, per_page, **kwargs)
+
+    def get_pagination_mode(self):
+        """
+        'offset' (numbered pages) or 'keyset' (next/previous cursors).
+        """
+        return getattr(settings, 'MYADMIN_LIST_PAGINATION', 'offset')
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.get_pagination_mode() != 'keyset':
+            return super(ModelListView, self).paginate_queryset(
+                queryset, page_size
+            )
+        paginator = ModelCursorPagination()
+        paginator.page_size = page_size
+        if self.sort_ordering:
+            paginator.ordering = tuple(self.sort_ordering)
+        object_list = paginator.paginate_queryset(
+            queryset, Request(self.request), view=self
+        )
+        is_paginated = paginator.has_next or paginator.has_previous
+        return (paginator, None, object_list, is_paginated)
+
+    def get_sort_links(self, query):
+        """
+        `(field name, query string, direction)` of the columns the list
+        can be sorted by, a link sorts by the column or reverses it.
+        """
+        current = query.get('ordering', '') if self.sort_ordering else ''
+        links = []
+        for name in get_sort_fields(
+                self.model_info.model,
+                cursor=self.get_pagination_mode() == 'keyset'):
+            direction = {name: 'asc', '-' + name: 'desc'}.get(current)
+            params = query.copy()
+            params.pop('cursor', None)
+            params['ordering'] = '-' + name if direction == 'asc' else name
+            links.append((name, params.urlencode(), direction))
+        return links
 
     def get_context_data(self, **kwargs):
         context = super(ModelListView, self).get_context_data(**kwargs)
         context['model_name'] = self.model_name
-        app_, model_ = self.model_name.split('.')
-        context['add_perm'] = '{}.add_{}'.format(app_.lower(), model_.lower())
-        context['delete_perm'] = '{}.delete_{}'.format(
-            app_.lower(), model_.lower()
-        )
-        context['change_perm'] = '{}.change_{}'.format(
-            app_.lower(), model_.lower()
-        )
+        context['filter'] = self.filterset
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        context['filter_query'] = query.urlencode()
+        context['sort_fields'] = self.get_sort_links(query)
+        context['ordering_error'] = self.ordering_error
+        for action in ('add', 'change', 'delete'):
+            context['can_' + action] = can(
+                self.request.user, action, self.model_info.model
+            )
         return context
 
 
-class ObjectCreateView(PermissionRequiredMixin, View):
+class ObjectCreateView(PanelPermissionMixin, View):
     permission_required = 'myadmin.access_panel'
     raise_exception = True
     template_name = 'myadmin/single_object_view.html'
 
     def get(self, request, model_name, *args, **kwargs):
-        app_, model_ = model_name.split('.')
-        permission_name = '{}.add_{}'.format(app_.lower(), model_.lower())
-        if not request.user.has_perm(permission_name):
-            raise PermissionDenied
-
         try:
-            model = apps.get_model(model_name)
+            info = self.get_model_info(model_name, 'add')
         except LookupError:
             return redirect('myadmin:panel')
+        model = info.model
 
         form = create_form(model)()
-        return render(
+        return TemplateResponse(
             request, self.template_name,
             {'form': form, 'model_name': model_name}
         )
 
     def post(self, request, model_name, *args, **kwargs):
-        app_, model_ = model_name.split('.')
-        permission_name = '{}.add_{}'.format(app_.lower(), model_.lower())
-        if not request.user.has_perm(permission_name):
-            raise PermissionDenied
-
         try:
-            model = apps.get_model(model_name)
+            info = self.get_model_info(model_name, 'add')
         except LookupError:
             return redirect('myadmin:panel')
+        model = info.model
         form = create_form(model)(request.POST)
 
         if form.is_valid():
             form.save()
             return redirect('myadmin:objects', model_name=model_name)
-        return render(
+        return TemplateResponse(
             request, self.template_name,
             {'form': form, 'model_name': model_name}
         )
 
 
-class ObjectEditView(PermissionRequiredMixin, View):
+class ObjectEditView(PanelPermissionMixin, View):
     permission_required = 'myadmin.access_panel'
     raise_exception = True
     template_name = 'myadmin/single_object_view.html'
+    conflict_message = (
+        'The object was changed by someone else since you opened it. '
+        'Reload the page to edit the current values.'
+    )
 
     def get(self, request, model_name, obj_pk, *args, **kwargs):
-        app_, model_ = model_name.split('.')
-        permission_name = '{}.change_{}'.format(app_.lower(), model_.lower())
-        if not request.user.has_perm(permission_name):
-            raise PermissionDenied
-
         try:
-            model = apps.get_model(model_name)
+            info = self.get_model_info(model_name, 'change')
         except LookupError:
             return redirect('myadmin:panel')
+        model = info.model
         obj = get_object_or_404(model, pk=obj_pk)
         form = create_form(model)(instance=obj)
-        return render(
-            request, self.template_name,
-            {'form': form, 'model_name': model_name}
-        )
+        return TemplateResponse(request, self.template_name, {
+            'form': form, 'model_name': model_name,
+            'version': concurrency.get_token(obj)
+        })
 
     def post(self, request, model_name, obj_pk, *args, **kwargs):
-        app_, model_ = model_name.split('.')
-        permission_name = '{}.change_{}'.format(app_.lower(), model_.lower())
-        if not request.user.has_perm(permission_name):
-            raise PermissionDenied
-
         try:
-            model = apps.get_model(model_name)
+            info = self.get_model_info(model_name, 'change')
         except LookupError:
             return redirect('myadmin:panel')
+        model = info.model
         obj = get_object_or_404(model, pk=obj_pk)
         form = create_form(model)(request.POST, instance=obj)
+        version = request.POST.get('_version') or None
+        status = 200
         if form.is_valid():
-            form.save()
+            try:
+                self.save_form(form, version)
+            except concurrency.ConcurrentModificationError:
+                form.add_error(None, self.conflict_message)
+                status = 409
+            else:
+                return redirect('myadmin:objects', model_name=model_name)
+        return TemplateResponse(request, self.template_name, {
+            'form': form, 'model_name': model_name, 'version': version
+        }, status=status)
+
+    def save_form(self, form, version=None):
+        """
+        Write only the changed columns, conditionally on the version token
+        of the form if it has one.
+        """
+        obj = form.save(commit=False)
+        with transaction.atomic():
+            concurrency.save_changes(obj, form.changed_data, version)
+            form.save_m2m()
+
+
+class ObjectDeleteView(PanelPermissionMixin, View):
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    template_name = 'myadmin/bulk_delete.html'
+
+    def get(self, request, model_name, obj_pk):
+        try:
+            info = self.get_model_info(model_name, 'delete')
+        except LookupError:
+            return redirect('myadmin:panel')
+        model = info.model
+        obj = get_object_or_404(model, pk=obj_pk)
+        queryset = model._default_manager.filter(pk=obj.pk)
+        try:
+            bulk.chunked_delete(queryset)
+        except ProtectedError as e:
+            # nothing was deleted, show what protects the object
+            return TemplateResponse(request, self.template_name, {
+                'ids': [obj.pk], 'model_name': model_name,
+                'preview': bulk.cascade_preview(queryset),
+                'error': e.args[0], 'protected': True
+            }, status=409)
+        return redirect('myadmin:objects', model_name=model_name)
+
+
+class ObjectBulkDeleteView(PanelPermissionMixin, View):
+    """
+    Deletes the selected `ids` or the `pk_min`..`pk_max` range after a
+    confirmation page with the cascade preview.
+    """
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    template_name = 'myadmin/bulk_delete.html'
+
+    def get_selection(self, request, model):
+        pk_field = model._meta.pk
+        values = {}
+        for name in ('pk_min', 'pk_max'):
+            try:
+                values[name] = pk_field.to_python(request.POST.get(name))
+            except ValidationError:
+                values[name] = None
+        ids = []
+        if 'range' in request.POST:
+            return dict(values, ids=ids)
+        for value in request.POST.getlist('ids'):
+            try:
+                ids.append(pk_field.to_python(value))
+            except ValidationError:
+                continue
+        values['ids'] = [pk for pk in ids if pk is not None]
+        return values
+
+    def get_queryset(self, model, selection):
+        queryset = model._default_manager.all()
+        if selection['ids']:
+            return queryset.filter(pk__in=selection['ids'])
+        if selection['pk_min'] is None and selection['pk_max'] is None:
+            return None
+        if selection['pk_min'] is not None:
+            queryset = queryset.filter(pk__gte=selection['pk_min'])
+        if selection['pk_max'] is not None:
+            queryset = queryset.filter(pk__lte=selection['pk_max'])
+        return queryset
+
+    def post(self, request, model_name):
+        try:
+            info = self.get_model_info(model_name, 'delete')
+        except LookupError:
+            return redirect('myadmin:panel')
+
+        selection = self.get_selection(request, info.model)
+        queryset = self.get_queryset(info.model, selection)
+        if queryset is None:
             return redirect('myadmin:objects', model_name=model_name)
-        return render(
-            request, self.template_name,
-            {'form': form, 'model_name': model_name}
+
+        error = None
+        if 'confirm' in request.POST:
+            try:
+                bulk.chunked_delete(queryset)
+            except ProtectedError as e:
+                error = e.args[0]
+            else:
+                return redirect('myadmin:objects', model_name=model_name)
+        preview = bulk.cascade_preview(queryset)
+        context = dict(
+            selection, model_name=model_name, preview=preview, error=error,
+            protected=any(row[2] == 'PROTECT' for row in preview)
         )
+        return TemplateResponse(request, self.template_name, context)
 
 
-class ObjectDeleteView(PermissionRequiredMixin, View):
+class ExportView(PanelPermissionMixin, View):
+    """
+    Streams all objects of a model as CSV or JSON lines, for users who
+    may add, change or delete them.
+
+    `?fields=a,b` selects the columns, `?pk_min=` and `?pk_max=` limit
+    the exported pk range.
+    """
     permission_required = 'myadmin.access_panel'
     raise_exception = True
 
-    def get(self, request, model_name, obj_pk):
-        app_, model_ = model_name.split('.')
-        permission_name = '{}.delete_{}'.format(app_.lower(), model_.lower())
-        if not request.user.has_perm(permission_name):
-            raise PermissionDenied
+    def get(self, request, model_name, export_format):
+        try:
+            info = self.get_model_info(model_name)
+        except LookupError:
+            return redirect('myadmin:panel')
+
+        names = [
+            name.strip() for name in request.GET.get('fields', '').split(',')
+            if name.strip()
+        ]
+        try:
+            fields = export.get_export_fields(info.model, names)
+        except LookupError as e:
+            return HttpResponseBadRequest(str(e))
 
+        queryset = info.model._default_manager.all()
+        pk_field = info.model._meta.pk
         try:
-            model = apps.get_model(model_name)
+            for param, lookup in (('pk_min', 'gte'), ('pk_max', 'lte')):
+                value = pk_field.to_python(request.GET.get(param) or None)
+                if value is not None:
+                    queryset = queryset.filter(**{'pk__' + lookup: value})
+        except ValidationError as e:
+            return HttpResponseBadRequest(', '.join(e.messages))
+
+        stream, content_type = export.STREAMS[export_format]
+        response = StreamingHttpResponse(
+            stream(queryset, fields), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="{}.{}"'.format(info.label, export_format)
+        )
+        return response
+
+
+class ImportView(PanelPermissionMixin, View):
+    """
+    Imports an uploaded CSV or JSON lines file, see `myadmin.importer`.
+    """
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    template_name = 'myadmin/import.html'
+
+    def get(self, request, model_name):
+        try:
+            self.get_model_info(model_name, 'add')
         except LookupError:
             return redirect('myadmin:panel')
-        get_object_or_404(model, pk=obj_pk).delete()
-        return redirect('myadmin:objects', model_name=model_name)
+        return TemplateResponse(
+            request, self.template_name,
+            {'form': ImportForm(), 'model_name': model_name}
+        )
+
+    def post(self, request, model_name):
+        try:
+            info = self.get_model_info(model_name, 'add')
+        except LookupError:
+            return redirect('myadmin:panel')
+        form = ImportForm(request.POST, request.FILES)
+        result = None
+        if form.is_valid():
+            result = Importer(info.model).run(
+                iter_records(
+                    form.cleaned_data['file'],
+                    form.cleaned_data['file_format']
+                ),
+                skip=form.cleaned_data['skip']
+            )
+        return TemplateResponse(
+            request, self.template_name,
+            {'form': form, 'model_name': model_name, 'result': result}
+        )
+
+
+class SearchView(PanelPermissionMixin, View):
+    """
+    Full-text search in the panel models, see `myadmin.search`.
+    """
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    template_name = 'myadmin/search.html'
+
+    def get_results(self, query):
+        """
+        `(model info, object, snippet, editable)` of the search results,
+        objects are loaded with one query per model.
+        """
+        results = search.search(query)
+        pks = {}
+        for result in results:
+            pks.setdefault(result.label, []).append(result.pk)
+        objects = {}
+        for label, model_pks in pks.items():
+            model = catalog.get_model(label)
+            pk_field = model._meta.pk
+            objects[label] = {
+                str(pk): obj for pk, obj in model._default_manager.in_bulk(
+                    [pk_field.to_python(pk) for pk in model_pks]
+                ).items()
+            }
+        editable = {
+            label: can(self.request.user, 'change', label) for label in pks
+        }
+        return [
+            (catalog.get(result.label), objects[result.label][result.pk],
+             result.snippet, editable[result.label])
+            for result in results
+            if result.pk in objects[result.label]
+        ]
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        results = self.get_results(query) if query else []
+        return TemplateResponse(
+            request, self.template_name,
+            {'query': query, 'results': results}
+        )
+
+
+class AutocompleteView(PanelPermissionMixin, View):
+    """
+    JSON choices of a relation of a model, for autocomplete widgets.
+
+    `?q=` is a prefix of the `autocomplete_field` of the related model,
+    so the search and the ordering use its index. Pages are selected by
+    keyset with the opaque `next` cursor, never by OFFSET; rows without
+    a value come last, by primary key.
+
+    Choices are only listed for users who may add or change objects of
+    the model and can access the related model.
+    """
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    page_size = 20
+
+    def get_field(self, model_name, field_name):
+        try:
+            info = catalog.get(model_name)
+        except LookupError:
+            raise Http404
+        if not (can(self.request.user, 'add', info.model) or
+                can(self.request.user, 'change', info.model)):
+            raise PermissionDenied
+        form_field = create_form(info.model).base_fields.get(field_name)
+        if not isinstance(form_field, ModelChoiceField):
+            raise Http404
+        field = info.model._meta.get_field(field_name)
+        if not can_any(self.request.user, field.related_model):
+            raise PermissionDenied
+        return field, form_field
+
+    def get_queryset(self, field):
+        queryset = field.related_model._default_manager.complex_filter(
+            field.get_limit_choices_to()
+        )
+        return plan_for_display(queryset)
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(
+                base64.urlsafe_b64decode(cursor.encode()).decode()
+            )
+        except (TypeError, ValueError, UnicodeError):
+            return None
+        if not isinstance(values, list) or len(values) != 2:
+            return None
+        return values
+
+    def filter_queryset(self, queryset, search_field, query, position):
+        pk_field = queryset.model._meta.pk
+        if search_field is None:
+            if query:
+                try:
+                    queryset = queryset.filter(pk=pk_field.to_python(query))
+                except ValidationError:
+                    return queryset.none()
+            if position is not None:
+                queryset = queryset.filter(pk__gt=position[1])
+            return queryset.order_by('pk')
+        if query:
+            lower, upper = prefix_range(query)
+            queryset = queryset.filter(**{
+                search_field + '__gte': lower, search_field + '__lt': upper
+            })
+        if position is not None:
+            value, pk = position
+            if value is None:
+                queryset = queryset.filter(
+                    **{search_field + '__isnull': True, 'pk__gt': pk}
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{search_field + '__gt': value}) |
+                    Q(**{search_field: value, 'pk__gt': pk}) |
+                    Q(**{search_field + '__isnull': True})
+                )
+        if not queryset.model._meta.get_field(search_field).null:
+            return queryset.order_by(search_field, 'pk')
+        return queryset.order_by(F(search_field).asc(nulls_last=True), 'pk')
+
+    def get(self, request, model_name, field_name):
+        field, form_field = self.get_field(model_name, field_name)
+        queryset = self.get_queryset(field)
+        search_field = autocomplete_field(queryset.model)
+        position = None
+        if request.GET.get('cursor'):
+            position = self.decode_cursor(request.GET['cursor'])
+            if position is None:
+                return HttpResponseBadRequest('Invalid cursor.')
+        try:
+            queryset = self.filter_queryset(
+                queryset, search_field, request.GET.get('q', '').strip(),
+                position
+            )
+            objs = list(queryset[:self.page_size + 1])
+        except (TypeError, ValueError, ValidationError):
+            return HttpResponseBadRequest('Invalid cursor.')
+        next_cursor = None
+        if len(objs) > self.page_size:
+            objs = objs[:self.page_size]
+            last = objs[-1]
+            next_cursor = self.encode_cursor([
+                getattr(last, search_field) if search_field else None,
+                str(last.pk)
+            ])
+        return JsonResponse({
+            'results': [
+                {
+                    'id': form_field.prepare_value(obj),
+                    'text': form_field.label_from_instance(obj),
+                } for obj in objs
+            ],
+            'next': next_cursor,
+        })
+
+
+class TimingView(PanelPermissionMixin, View):
+    """
+    Rolling per-view percentiles recorded by `timing.TimingMiddleware`.
+    """
+    permission_required = 'myadmin.access_panel'
+    raise_exception = True
+    template_name = 'myadmin/timing.html'
+
+    def get(self, request):
+        return TemplateResponse(
+            request, self.template_name,
+            {'aggregates': sorted(timing.get_aggregates().items())}
+        )
@@ -41,12 +41,13 @@ INSTALLED_APPS = [
     'myadmin',
     'testapp',
     'rest_framework',
+    'django_filters',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'myadmin.api.permissions.PanelAccessPermission',
-        'rest_framework.permissions.DjangoModelPermissions',
+        'myadmin.api.permissions.ModelActionPermission',
     ],
     'PAGE_SIZE': 5
 }
@@ -89,9 +90,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
 }
 
+# Read replica for myadmin, used once it is listed in MYADMIN_REPLICAS
+# with myadmin.routers.ReplicaRouter and ReplicaMiddleware installed.
+# SKYGATE_REPLICA=1 adds one, e.g. to run the replica routing tests.
+if os.environ.get('SKYGATE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+    }
+
+
+# myadmin keeps its version stamps in the default cache, the per-process
+# LocMemCache default only works with a single process. Deployments with
+# several workers need a shared backend (`manage.py check --deploy`).
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "skygate.settings")
 
 application = get_wsgi_application()
+
+# build all panel forms on the first request of the worker
+from myadmin.forms import prebuild_on_first_request  # noqa: E402
+
+application = prebuild_on_first_request(application)
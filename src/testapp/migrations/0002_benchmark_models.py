@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-18 20:28
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('testapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenchCategory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BenchRelated',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='testapp.BenchCategory')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='testapp.TestModel1')),
+                ('tags', models.ManyToManyField(blank=True, related_name='tagged', to='testapp.BenchCategory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BenchWide',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('char_1', models.CharField(max_length=100)),
+                ('char_2', models.CharField(blank=True, max_length=100)),
+                ('char_3', models.CharField(blank=True, max_length=100)),
+                ('char_4', models.CharField(blank=True, max_length=100)),
+                ('char_5', models.CharField(blank=True, max_length=100)),
+                ('char_6', models.CharField(blank=True, max_length=100)),
+                ('int_1', models.IntegerField(default=0)),
+                ('int_2', models.IntegerField(default=0)),
+                ('int_3', models.IntegerField(default=0)),
+                ('int_4', models.IntegerField(default=0)),
+                ('int_5', models.IntegerField(default=0)),
+                ('int_6', models.IntegerField(default=0)),
+                ('decimal', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('flag', models.BooleanField(default=False)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('text', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='benchrelated',
+            name='wide',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='testapp.BenchWide'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-18 20:53
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0003_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenchLock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='testapp.BenchRelated')),
+            ],
+        ),
+    ]
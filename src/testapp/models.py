@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 
@@ -17,3 +19,79 @@ class TestModel2(models.Model):
 
     def __str__(self):
         return self.text[:50]
+
+
+class TestComment(models.Model):
+    """
+    Optional relation rendered by __str__.
+    """
+    text = models.TextField()
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.SET_NULL
+    )
+
+    def __str__(self):
+        return '{}: {}'.format(self.author or 'anonymous', self.text)
+
+
+# Synthetic models seeded by the benchmark command.
+
+
+class BenchCategory(models.Model):
+    name = models.CharField(max_length=100, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+
+class BenchWide(models.Model):
+    """
+    Many columns, to measure row width.
+    """
+    char_1 = models.CharField(max_length=100)
+    char_2 = models.CharField(max_length=100, blank=True)
+    char_3 = models.CharField(max_length=100, blank=True)
+    char_4 = models.CharField(max_length=100, blank=True)
+    char_5 = models.CharField(max_length=100, blank=True)
+    char_6 = models.CharField(max_length=100, blank=True)
+    int_1 = models.IntegerField(default=0)
+    int_2 = models.IntegerField(default=0)
+    int_3 = models.IntegerField(default=0)
+    int_4 = models.IntegerField(default=0)
+    int_5 = models.IntegerField(default=0)
+    int_6 = models.IntegerField(default=0)
+    decimal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    flag = models.BooleanField(default=False)
+    created = models.DateTimeField(default=timezone.now)
+    text = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.char_1
+
+
+class BenchRelated(models.Model):
+    """
+    Many relations and a __str__ following one of them, to measure joins.
+    """
+    name = models.CharField(max_length=100)
+    category = models.ForeignKey(BenchCategory, on_delete=models.CASCADE)
+    parent = models.ForeignKey(TestModel1, on_delete=models.CASCADE)
+    wide = models.ForeignKey(BenchWide, on_delete=models.CASCADE)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.SET_NULL
+    )
+    tags = models.ManyToManyField(
+        BenchCategory, related_name='tagged', blank=True
+    )
+
+    def __str__(self):
+        return '{} ({})'.format(self.name, self.category)
+
+
+class BenchLock(models.Model):
+    """
+    Protects a related row from deletion.
+    """
+    related = models.ForeignKey(BenchRelated, on_delete=models.PROTECT)